@@ -1,519 +1,272 @@
-import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-
+import os
+from functools import partial
 
-# Google Sheets URLs
-project_sheet_url = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vSi8SH1hivNxPLDZaVQBDqMQLFcwGLVkSNzQmmsXCvZbA8cHBvsC9sPkVF9NjKKkXm93lV13cAA0wrT/pub?output=csv'
-idle_time_url = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vSim4lC_gDM7-CE35oHbF5kRMpAiLv8YRXDAZC4SYHSRq6XfS62pngKd0efrAkIvTEBlv728_JC-G5t/pub?output=csv'
-Project_status = 'https://docs.google.com/spreadsheets/d/e/2PACX-1vRNe0IR8SyrCU7H6J4gRXswVJVKukw0VFivj61AYCvJH96BovUJByWNKP95-kSiEV-rR1wc-F9NMYUF/pub?output=csv'
+import streamlit as st
 
-# Caching the data loading for efficiency
-@st.cache_data(ttl=60)
-def load_data(url):
-    return pd.read_csv(url)
+from soms import startup
+from soms.artifacts import fresh_artifact, read_artifact
+from soms.exports import EXPORT_FILES, EXPORTS, FORMATS
+from soms.figcache import FIGURES
+from soms.pages import PAGES
+from soms.perf import BACKGROUND, Recorder, export_prometheus
+from soms.refresher import Refresher, format_age
+from soms.sources import SOURCES, SOURCES_BY_NAME
+
+# Only light modules are imported above. pandas, pyarrow and the page modules
+# (with plotly) load when a run first needs them, timed by soms.startup, so a
+# fresh worker paints a prerendered page while the sheets load in the background
+startup.mark('first_run')
+
+
+# One background refresher per process loads all sheets at startup (the sheet
+# the first run shows ahead of the others) and refreshes them ahead of their
+# interval; each sheet is revalidated against the local snapshot, then typed
+# and derived once into a Dataset that all sessions share read-only.
+# SOMS_BACKEND=sqlite keeps the sheets in a local SQLite file instead of
+# memory, with filters and aggregates run as queries.
+@st.cache_resource
+def get_refresher(_first=None):
+    store = startup.timed_import('soms.sqlstore').SqlStore() if os.environ.get('SOMS_BACKEND') == 'sqlite' else None
+    return Refresher(SOURCES, max_workers=int(os.environ.get('SOMS_REFRESH_WORKERS', 3)), store=store).start(_first)
+
+def load_data(sheet):
+    return get_refresher().dataset(sheet)
 
 # Sidebar
 st.sidebar.title("Select a Data Source")
 data_source = st.sidebar.radio("Choose a sheet", ("Project Timeline", "Project Status", "Idle Manpower"))
 
-# # Filters section
-# st.sidebar.subheader("Filters")
-# year_filter = st.sidebar.selectbox("Year", [2022, 2023, 2024])  # Example filter for years
-# month_filter = st.sidebar.selectbox("Month", ["January", "February", "March"])  # Example filter for months
-# client_filter = st.sidebar.selectbox("Client", ["Client A", "Client B", "Client C"])  # Example filter for clients
-# site_filter = st.sidebar.selectbox("Site", ["Site 1", "Site 2", "Site 3"])  # Example filter for sites
+# Per-stage timings for this run; shown in the sidebar panel and exported to
+# SOMS_PERF_LOG (JSON lines) / SOMS_PERF_PROM (Prometheus textfile) when set
+show_perf = st.sidebar.checkbox("Show performance panel")
+perf_log = os.environ.get('SOMS_PERF_LOG')
+perf_prom = os.environ.get('SOMS_PERF_PROM')
+perf = Recorder(data_source, trace_memory=bool(os.environ.get('SOMS_TRACE_MEMORY')))
+
+# Filter lookups are built once per dataset version and shared by all sessions
+@st.cache_resource(max_entries=6)
+def get_filter_index(fingerprint, _dataset):
+    return startup.timed_import('soms.filters').build_index(_dataset)
+
+# Prebuilt pages (python -m soms.prerender) are shared by all sessions; read
+# once per artifact version
+@st.cache_resource(max_entries=6)
+def get_artifact(path):
+    return read_artifact(path)
+
+# Serve the sheet's prebuilt page while it was built from the data version this
+# process holds (or, before the sheet has loaded, from the local snapshot), so
+# the default view needs no loaded sheet; it also provides the filter options
+with perf.span('read', 'artifact') as span:
+    artifact_path = fresh_artifact(SOURCES_BY_NAME[data_source], get_refresher(data_source).version(data_source))
+    artifact = get_artifact(artifact_path) if artifact_path else None
+    span['rows'] = artifact.rows if artifact else None
 
 # Load the appropriate data based on the selected sheet
+if artifact is None:
+    source_dataset = load_data(data_source)
+    filter_index = get_filter_index(source_dataset.fingerprint, source_dataset)
+else:
+    source_dataset = None
+    filter_index = artifact
+
+# Filters section ("All" leaves a filter off)
+st.sidebar.subheader("Filters")
+selection = {}
+if filter_index.years():
+    year_filter = st.sidebar.selectbox("Year", ["All"] + filter_index.years())
+    month_filter = st.sidebar.selectbox("Month", ["All"] + filter_index.months())
+    selection['year'] = None if year_filter == "All" else year_filter
+    selection['month'] = None if month_filter == "All" else month_filter
+for label in ("Client", "Site"):
+    if filter_index.values(label):
+        value = st.sidebar.selectbox(label, ["All"] + filter_index.values(label))
+        selection[label] = None if value == "All" else value
+
+# Page options
+page_options = {}
+if data_source == "Idle Manpower":
+    # Bucket size of the idle manhours line chart (Auto picks it from the date range)
+    granularities = startup.timed_import('soms.downsample').GRANULARITIES
+    page_options['granularity'] = st.sidebar.selectbox("Group by", ["Auto"] + [name for name, _, _ in granularities])
 if data_source == "Project Timeline":
-    df = load_data(project_sheet_url)
-elif data_source == "Idle Manpower":
-    df = load_data(idle_time_url)
-elif data_source == "Project Status":
-    df = load_data(Project_status)
-
-# Main area header and dropdown for pages
-st.title("SOMS Dashboard")
-# page = st.selectbox("Select Page", ["Timeline Chart", "Idle Manpower", "Project Status"])
-
-
-# Main content area based on dropdown selection
-#if page == "Timeline Chart":
-if data_source == "Project Timeline":
-    st.subheader("Timeline Chart")
-    
-        #vertical space
-    st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
-
-    # Convert columns to datetime
-    df['Expected Start'] = pd.to_datetime(df['Expected Start'], format='%d-%b-%Y', errors='coerce')
-    df['Expected End'] = pd.to_datetime(df['Expected End'], format='%d-%b-%Y', errors='coerce')
-    df['Actual Start'] = pd.to_datetime(df['Actual Start'], format='%d-%b-%Y', errors='coerce')
-    df['Actual End'] = pd.to_datetime(df['Actual End'], errors='coerce')
-
-    # Update Actual End dates
-    today = pd.Timestamp.now().normalize()
-    df['Actual End'] = df['Actual End'].fillna(today)
-    df.loc[df['Actual End'] > today, 'Actual End'] = today
-
-        # Filter data
-    df_filtered = df.dropna(subset=['Expected Start', 'Expected End'])
-    df_filtered = df_filtered[~df_filtered['Actual Start'].isna()]
-
-    # Create Gantt Chart    
-    fig = go.Figure()
-
-    for i, row in df_filtered.iterrows():
-        if pd.notna(row['Expected Start']) and pd.notna(row['Expected End']):
-            fig.add_trace(go.Scatter(
-                    x=[row['Expected Start'], row['Expected End']],
-                    y=[row['job_code'], row['job_code']],
-                    mode='lines+markers',
-                    line=dict(color='orange', width=15),
-                    name='Expected',
-                    hoverinfo='text',
-                    text=f"Expected: {row['Expected Start'].strftime('%b %d')} to {row['Expected End'].strftime('%b %d')}",
-                ))
-
-            if pd.notna(row['Actual Start']):
-                fig.add_trace(go.Scatter(
-                    x=[row['Actual Start'], row['Actual End']],
-                    y=[row['job_code'], row['job_code']],
-                    mode='lines+markers',
-                    line=dict(color='red', width=5),
-                    name='Actual',
-                    hoverinfo='text',
-                    text=f"Actual: {row['Actual Start'].strftime('%b %d')} to {row['Actual End'].strftime('%b %d')}",
-                ))
-
-        # Add annotations for Expected and Actual dates
-    for i, row in df_filtered.iterrows():
-            if pd.notna(row['Expected Start']):
-                fig.add_annotation(
-                    x=row['Expected Start'],
-                    y=row['job_code'],
-                    text=f"{row['Expected Start'].strftime('%b %d')}",
-                    showarrow=False,
-                    xshift=-10,
-                    yshift=10,
-                    font=dict(size=7, color='orange')
-                )
-            if pd.notna(row['Expected End']):
-                fig.add_annotation(
-                    x=row['Expected End'],
-                    y=row['job_code'],
-                    text=f"{row['Expected End'].strftime('%b %d')}",
-                    showarrow=False,
-                    xshift=10,
-                    yshift=10,
-                    font=dict(size=8, color='orange')
-                )
-            if pd.notna(row['Actual Start']):
-                fig.add_annotation(
-                    x=row['Actual Start'],
-                    y=row['job_code'],
-                    text=f"{row['Actual Start'].strftime('%b %d')}",
-                    showarrow=False,
-                    xshift=-10,
-                    yshift=-20,
-                    font=dict(size=7, color='red')
-                )
-            if pd.notna(row['Actual End']):
-                fig.add_annotation(
-                    x=row['Actual End'],
-                    y=row['job_code'],
-                    text=f"{row['Actual End'].strftime('%b %d')}",
-                    showarrow=False,
-                    xshift=10,
-                    yshift=-20,
-                    font=dict(size=7, color='red')
-                )
-
-        # Update layout
-    fig.update_layout(
-            title='Gantt Chart: Expected vs Actual Dates',
-            xaxis_title='Date',
-            yaxis_title='Job Code',
-            xaxis=dict(type='date', tickformat='%b %Y'),
-            xaxis_range=[df['Expected Start'].min(), df['Expected End'].max()],
-            showlegend=False,
-            legend=dict(yanchor="bottom", y=1.02, xanchor="right", x=1),
-            height=400 + len(df_filtered) * 20,  # Dynamic height based on the number of tasks
-            margin=dict(l=0, r=0, t=40, b=0)
+    # Gantt window: jobs per page within an optional date window, paging on
+    # from the first matching job code or the first active job
+    st.sidebar.subheader("Gantt")
+    gantt_rows = st.sidebar.selectbox("Jobs per page", [100, 50, 200, 500, "All"])
+    gantt_window = st.sidebar.date_input("Date window", value=())
+    page_options['window'] = tuple(gantt_window) if len(gantt_window) == 2 else None
+    page_options['find'] = st.sidebar.text_input("Find job code").strip()
+    page_options['active'] = st.sidebar.checkbox("Start at active jobs")
+    page_options['rows'] = None if gantt_rows == "All" else gantt_rows
+    page_options['page'] = st.sidebar.number_input("Page", min_value=1, value=1, step=1)
+# Project Status can also be viewed across its logged versions (soms.history):
+# trends and changes of a value column within a date window (by default the
+# last 90 days), for the jobs picked or those that changed most. The Client
+# filter applies; the prebuilt overview stays in use for the sheet itself.
+history_options = None
+if data_source == "Project Status" and st.sidebar.radio("View", ["Overview", "History"], horizontal=True) == "History":
+    history_module = startup.timed_import('soms.history')
+    history = history_module.History(data_source)
+    st.sidebar.subheader("History")
+    history_window = st.sidebar.date_input("Versions between", value=())
+    history_options = {
+        'column': st.sidebar.selectbox("Value", history_module.VALUE_COLUMNS,
+                                       index=history_module.VALUE_COLUMNS.index('Balance')),
+        'window': tuple(history_window) if len(history_window) == 2 else None,
+        'jobs': tuple(st.sidebar.multiselect("Jobs", history.keys())),
+        'client': selection.get('Client'),
+    }
+
+# Filtered and non-default views are built from the sheet
+if artifact is not None and (any(value is not None for value in selection.values()) or page_options != artifact.options):
+    artifact = None
+    source_dataset = load_data(data_source)
+    filter_index = get_filter_index(source_dataset.fingerprint, source_dataset)
+
+if artifact is None:
+    store = startup.timed_import('soms.store')
+    with perf.span('transform', 'filter') as span:
+        dataset = startup.timed_import('soms.filters').filter_dataset(source_dataset, filter_index, **selection)
+        span['rows'] = rows = store.row_count(dataset)
+    parse_errors = dataset.parse_errors
+else:
+    rows = artifact.rows
+    parse_errors = artifact.parse_errors
+
+# Downloads of the page's data. Each file is written by a streaming writer when
+# first clicked (off the script thread) and cached on disk while the data is
+# unchanged; a prebuilt page's exports load the whole sheet then.
+def export_data(refresher, sheet, dataset, export, fmt):
+    if dataset is None:
+        dataset = refresher.dataset(sheet)
+    with open(EXPORT_FILES.path(dataset, export, fmt), 'rb') as f:
+        return f.read()
+
+st.sidebar.subheader("Export")
+for export in EXPORTS[data_source]:
+    st.sidebar.caption(export.label)
+    for col, (fmt, mime) in zip(st.sidebar.columns(len(FORMATS)), FORMATS.items()):
+        col.download_button(fmt, partial(export_data, get_refresher(), data_source,
+                                         dataset if artifact is None else None, export, fmt),
+                            file_name=f"{export.name}.{fmt}", mime=mime, key=f"export-{export.name}-{fmt}",
+                            on_click="ignore")
+
+# Background fetch/read/parse (and history logging) timings of the last refresh
+# of this sheet. They are shown with the run but not counted in its total, and
+# exported once per refresh: the fetch per revalidation, the rest per version
+# loaded
+refresh_timings = get_refresher().timings.get(data_source, {})
+for stage in ('fetch', 'read', 'parse', 'history'):
+    if stage in refresh_timings:
+        refresh = f"{refresh_timings['fetched_at']:.6f}" if stage == 'fetch' else refresh_timings.get('version')
+        perf.add(stage, BACKGROUND, refresh_timings[stage], rows=refresh_timings.get('rows'), refresh=refresh)
+
+# Send a serialized chart (soms.figcache.Spec) to the browser as-is. This is
+# what st.plotly_chart does after validating and serializing a figure again,
+# which for large charts costs more than building them. It relies on Streamlit
+# internals (the version range in requirements.txt is the one tested, and
+# tests/test_app.py fails if this path breaks); if they move, fall back to
+# st.plotly_chart. Everything that can fail runs before the element id is
+# registered, and the fallback gets its own key, so a failure after that can
+# not make it collide with the id taken.
+def emit_plotly_spec(spec):
+    from streamlit.elements.lib.form_utils import current_form_id
+    from streamlit.elements.lib.layout_utils import LayoutConfig
+    from streamlit.elements.lib.utils import compute_and_register_element_id
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart
+
+    proto = PlotlyChart()
+    proto.theme = "streamlit"
+    proto.form_id = current_form_id(st._main)
+    proto.spec = spec.json
+    proto.config = "{}"
+    layout_config = LayoutConfig(width="stretch", height=spec.height or 450)
+    enqueue = st._main._enqueue
+    proto.id = compute_and_register_element_id(
+        "plotly_chart", user_key=None, key_as_main_identity=False, dg=st._main,
+        plotly_spec=proto.spec, plotly_config=proto.config, theme="streamlit",
     )
-    st.plotly_chart(fig)
-# Close the box    
+    enqueue("plotly_chart", proto, layout_config=layout_config)
 
-elif data_source == "Idle Manpower":
-    st.subheader("Idle Manpower Report")
+def show_chart(spec, name):
+    with perf.span('render', name) as span:
+        try:
+            emit_plotly_spec(spec)
+        except Exception:
+            import plotly.io
+            st.plotly_chart(plotly.io.from_json(spec.json), key=f"chart-{name}")
+        span['bytes'] = len(spec.json)
 
-    #vertical space
-    st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
-    
-    # Data for the cards
-    # Calculate Idle Manhours
-    df['Idle Manhours'] = df['Days Idle'] * 9
-    # Aggregate Idle Manhours by Date
-    df_daily_idle = df.groupby('Date').agg({'Idle Manhours': 'sum'}).reset_index()
-    # Calculate average idle manhours
-    average_idle_manhours = df_daily_idle['Idle Manhours'].mean()
-    # Calculate average cost of idle time
-    avg_cost_of_idle_time = df['Pay Per Day'].mean().round(0)
-    # Calculate total idle mandays
-    total_idle_mandays = df['Days Idle'].sum()
-    # Data Cards to Display metrics in cards
-    col1, col2, col3 = st.columns(3)
+if parse_errors:
+    st.sidebar.warning("Unparsed cells: " + ", ".join(f"{col} ({count})" for col, count in parse_errors.items()))
 
-    with col1:
-        st.metric(label="Daily Avg Idle Manhours", value=f"{average_idle_manhours:,.0f}")
+# Data age per source
+st.sidebar.subheader("Data Status")
+for name, (age, error) in get_refresher().status().items():
+    st.sidebar.caption(f"{name}: updated {format_age(age)}" + (" (refresh failed)" if error else ""))
 
-    with col2:
-        st.metric(label="Avg Cost of Idle Time", value=f"{avg_cost_of_idle_time:,.0f}")
+# Main area header and dropdown for pages
+st.title("SOMS Dashboard")
 
-    with col3:
-        st.metric(label="Total Idle Mandays", value=total_idle_mandays)
+if not rows:
+    st.info("No rows match the selected filters.")
+    st.stop()
+
+# Main content area for the selected sheet: derived tables and figures are built
+# by the page function (or come prebuilt), then rendered here
+if history_options is not None:
+    page = PAGES["Project Status History"](history, perf, **history_options)
+elif artifact is not None:
+    page = artifact.page
+else:
+    page = PAGES[data_source](dataset, perf, **page_options)
+st.subheader(page.title)
+for note in page.notes:
+    st.caption(note)
+#vertical space
+st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
 
+if page.metrics:
+    # Data Cards to Display metrics in cards
+    for col, (label, value) in zip(st.columns(len(page.metrics)), page.metrics):
+        with col:
+            st.metric(label=label, value=value)
     #vertical space
     st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
 
-
-    if data_source == "Idle Manpower":
-        
-        # Convert the 'Date' column to datetime
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-        
-        df['Idle Manhours'] = df['Days Idle'] * 9
-        # Aggregate Idle Manhours by Date
-        df_daily_idle = df.groupby('Date').agg({'Idle Manhours': 'sum'}).reset_index()
-
-
-        # Create Line Chart
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=df_daily_idle['Date'],
-            y=df_daily_idle['Idle Manhours'],
-            mode='lines+markers+text',
-            line=dict(color='royalblue', width=2),
-            name='Idle Manhours',
-            text=df_daily_idle['Idle Manhours'],
-            textposition='top center',
-            textfont=dict(size=7)
-        ))
-
-
-        fig.update_layout(
-            title='Idle Manhours Per Day',
-            #xaxis_title='Date',
-            yaxis_title='Total Idle Manhours',
-            xaxis=dict(
-                type='date', 
-                tickformat='%b %d, %Y', 
-                showgrid=True,
-                #gridcolor='lightgray',
-                #gridwidth=0.1,
-                #dtick='W1',
-            ),
-            margin=dict(l=50, r=50, t=40, b=100),
-            shapes=[                       # Add border using shape
-                dict(
-                    type="rect",
-                    x0=0, y0=0, x1=1, y1=1,
-                    line=dict(color="#FFFFFC", width=0.5),
-                    xref="paper", yref="paper"
-                    )
-                ],
-                annotations=[                  # Annotation for total manhours
-        dict(
-            xref="paper", yref="paper",
-                    x=0.5, y=1.1,  # Position above the chart (right side)
-                    text=f"Avg Idle Hours per Day: {average_idle_manhours:,.0f}",  # Format to 2 decimal places
-                    showarrow=False,
-                    font=dict(size=14, color="orange"),
-                    bordercolor="white",
-                    borderwidth=0,
-                    borderpad=4,
-#                   bgcolor="#0e1117",
-                    )
-                ],
-
-            showlegend=False,
-            height=400,
-        )
-        
-        st.plotly_chart(fig)
-
-        #vertical space
-        st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
-
-
-        # Aggregate Idle Manhours by Client
-        df_client_idle = df.groupby('Client').agg({'Idle Manhours': 'sum'}).reset_index().sort_values(by='Idle Manhours', ascending=False)
-
-        # Calculate the total idle manhours
-        total_idle_manhours = df_client_idle['Idle Manhours'].sum()
-
-        # Create Bar Chart for Idle Manhours by Client
-        fig_client = go.Figure()
-        fig_client.add_trace(go.Bar(
-            x=df_client_idle['Client'],
-            y=df_client_idle['Idle Manhours'],
-            marker_color='indianred',
-            text=df_client_idle['Idle Manhours'],
-            textposition='auto',
-        ))
-
-        fig_client.update_layout(
-            title='Total Idle Manhours by Client',
-            #   xaxis_title='Client',
-            yaxis_title='Total Idle Manhours',
-            margin=dict(l=50, r=50, t=40, b=100),
-            height=400,
-            shapes=[                       # Add border using shape
-                dict(
-                    type="rect",
-                    x0=0, y0=0, x1=1, y1=1,
-                    line=dict(color="#FFFFFC", width=0.5),
-                    xref="paper", yref="paper"
-                    )
-                ],
-                annotations=[                  # Annotation for total manhours
-        dict(
-            xref="paper", yref="paper",
-                    x=0.5, y=1.1,  # Position above the chart (right side)
-                    text=f"Total Idle Manhours: {total_idle_manhours:,.0f}",  # Format to 2 decimal places
-                    showarrow=False,
-                    font=dict(size=14, color="orange"),
-                    bordercolor="white",
-                    borderwidth=0,
-                    borderpad=4,
-                    #    bgcolor="white",
-                    )
-                ]
-        )
-        # st.metric(label="Total Idle Manhours", value=f"{total_idle_manhours:,.0f}")
-
-        st.plotly_chart(fig_client)
-
+for i, (name, spec) in enumerate(page.figures):
+    if i:
         #vertical space
         st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
-
-
-        # Aggregate Cost of Idle time by Client
-        cost_of_idle_time = df['Pay Per Day'].sum().round(2)
-
-        df_client_cost = df.groupby('Client').agg({'Pay Per Day': 'sum'}).reset_index().sort_values(by='Pay Per Day', ascending=False)
-
-        total_row = pd.DataFrame({'Client': ['Total'], 'Pay Per Day': [cost_of_idle_time]})
-        df_client_cost = pd.concat([df_client_cost, total_row], ignore_index=True)
-
-        #df_client_cost = df.groupby('Client').agg({'Pay Per Day': 'sum'}).reset_index().sort_values(by='Pay Per Day', ascending=False)
-
-        # Create Waterfall Chart for Cost of Idle Time by Client
-        fig_client_cost = go.Figure()
-        fig_client_cost.add_trace(go.Waterfall(
-            name='Cost of Idle Time',
-            measure=['relative'] * (len(df_client_cost) - 1) + ['total'],
-#            measure=['relative','relative', 'relative', 'relative', 'relative', 'relative', 'total'],
-            x=df_client_cost['Client'],
-            y=df_client_cost['Pay Per Day'],
-            text=df_client_cost['Pay Per Day'],
-            textposition='auto',
-        ))
-
-        fig_client_cost.update_layout(
-            title='Total Cost of Idle Time by Client',
-            #xaxis_title='Client',
-            yaxis_title='Total Cost of Idle Time',
-            margin=dict(l=50, r=50, t=40, b=100),
-            height=600,
-            shapes=[                       # Add border using shape
-                dict(
-                    type="rect",
-                    x0=0, y0=0, x1=1, y1=1,
-                    line=dict(color="#FFFFFC", width=0.5),
-                    xref="paper", yref="paper"
-                    )
-                ],
-
-        )
-        st.plotly_chart(fig_client_cost)
-
-# Project Status page area 
-elif data_source == "Project Status":
-    #st.subheader("Project Status")
-    df_project_status = load_data(Project_status)
-    #st.write(df_project_status)
-
-    # clean numeric columns
-# Clean data in specific columns
-    df_clean = df_project_status[['PO Amount', 'Profit Margin', 'Estimated Budget', 
-                              'Allocated Budget to Project Team', 'Expense by Project Team', 
-                              'Balance', 'Profit Trend']]
-
-    # Replace unwanted characters and convert to numeric
-    df_clean = df_clean.apply(lambda col: col.str.replace('OMR', '')
-                                           .str.replace('(', '')
-                                           .str.replace(')', '')
-                                           .str.replace(',', '')
-                                           .str.replace('O', '')  # Remove stray 'O'
-                                           .str.replace('-', '')
-                                           .str.replace(' ', '')
-                                           .str.replace('#VALUE!', '')
-                                           .replace('', np.nan)   # Replace empty strings with NaN
-                                           .astype(float) if col.dtype == 'object' else col)
-    df_clean.fillna(0, inplace=True)
-
-    # Process the data with relevant columns
-    df_process = df_project_status[['Job Code','Client Name', 'PO received date', 'Project Type', 'S/ONO.','SO DATE','Remark']]
-    df_project_data = pd.concat([df_process,df_clean], axis=1)
-    #st.write(df_project_data)
-
-    # Calculate metrics based on the 'Remark' column
-    total_jobs = df_project_data['Job Code'].count()
-    completed_jobs = df_project_data[df_project_data['Remark'] == 'Completed'].shape[0]
-    ongoing_jobs = df_project_data[df_project_data['Remark'] == 'Ongoing'].shape[0]
-
-    # Subheader
-    st.subheader("Project Status Overview")
-    # Adds more vertical space
-    st.markdown("<br><br>", unsafe_allow_html=True)  
-
-
-    # Display metrics in cards
-    col1, col2, col3 = st.columns(3)
-
-    with col1:
-        st.metric(label="Total Jobs", value=total_jobs)
-
-    with col2:
-        st.metric(label="Completed Jobs", value=completed_jobs)
-
-    with col3:
-        st.metric(label="Ongoing Jobs", value=ongoing_jobs)
-
-# Vertical space
-    st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
-
-
-
-    # Donut chart for total jobs by status (Remark)
-    remark_counts = df_project_data['Remark'].value_counts()
-    fig_donut = go.Figure(data=[go.Pie(
-    labels=remark_counts.index,
-        values=remark_counts.values,
-        hole=0.4,
-            textinfo='label+percent',
-            marker=dict(colors=['gold', 'lightcoral', 'lightskyblue'])
-        )])
-    fig_donut.update_layout(title_text="Total Jobs by Status")
-    st.plotly_chart(fig_donut)
-
-# vertical space
-    st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
-
-
-
-# Stacked bar chart Client-wise with Completed and Ongoing Jobs
-# Group by client and remark, then filter clients with ongoing jobs
-    client_status = df_project_data.groupby(['Client Name', 'Remark']).size().unstack(fill_value=0)
-    ongoing_clients = df_project_data[df_project_data['Remark'] == 'Ongoing']['Client Name'].unique()
-
-# Filter client_status to include only those clients with ongoing jobs
-    client_status_filtered = client_status.loc[ongoing_clients]
-
-# Calculate the total number of jobs for each client
-    client_status_filtered['Total Jobs'] = client_status_filtered.sum(axis=1)
-
-# Create Stacked Bar Chart for Clients with Ongoing Jobs
-    fig_client = go.Figure()
-
-# Add bars for Completed Jobs
-    fig_client.add_trace(go.Bar(
-        x=client_status_filtered.index,
-        y=client_status_filtered['Completed'],
-        name='Completed Jobs',
-        marker_color='green',  # Customize as needed
-        text=client_status_filtered['Completed'],
-        textposition='inside',  # Display text inside the bars
-    ))
-
-# Add bars for Ongoing Jobs
-    fig_client.add_trace(go.Bar(
-        x=client_status_filtered.index,
-        y=client_status_filtered['Ongoing'],
-        name='Ongoing Jobs',
-        marker_color='#FF7F7F',  # Customize as needed
-        text=client_status_filtered['Ongoing'],
-        textposition='inside',  # Display text inside the bars
-    ))
-
-# Add annotations for total values
-    for i, client in enumerate(client_status_filtered.index):
-        total_value = client_status_filtered.loc[client, 'Total Jobs']
-        y_position = total_value + 2
-        fig_client.add_annotation(
-            x=client,
-            y=y_position,
-            text=f'{total_value}',
-            showarrow=False,
-            # arrowhead=2,
-            # ax=0,
-            # ay=-50,  # Adjust position of annotation
-            font=dict(size=12, color="orange")
-        )
-
-    fig_client.update_layout(
-        title='Completed and Ongoing Jobs by Client',
-        #xaxis_title='Client',
-        yaxis_title='Number of Jobs',
-        barmode='stack',
-        xaxis=dict(tickangle=-45),  # Rotate x-axis labels if needed for readability
-        height=400,
-        
-    )
-
-
-    st.plotly_chart(fig_client)
-
-#vertical space
-    st.markdown("<br><br>", unsafe_allow_html=True)  # Adds more vertical space
-
-# Stacked bar chart by Project Type with Completed and Ongoing Jobs
-    type_status = df_project_data.groupby(['Project Type', 'Remark']).size().unstack(fill_value=0)
-    fig_type = go.Figure()
-    for status in type_status.columns:
-        fig_type.add_trace(go.Bar(
-        x=type_status.index,
-        y=type_status[status],
-        name=status,
-        text=type_status[status],  # Show values inside bars
-            textposition='auto'
-        ))
-    
-    # Calculate the total number of jobs for each project type
-    totals = type_status.sum(axis=1)
-    
-    # Add annotations (total values) at the top of each stacked bar
-    annotations = []
-    for i, total in enumerate(totals):
-        annotations.append(dict(
-            x=type_status.index[i],
-            y=total,
-            text=str(total),
-            showarrow=False,
-            font=dict(size=12, color="orange"),
-            xanchor='center',
-            yanchor='bottom'
-        ))
-    
-    # Update layout to include title, axis labels, and annotations
-    fig_type.update_layout(
-        title='Completed and Ongoing Jobs by Project Type',
-        #xaxis_title='Project Type',
-        yaxis_title='Number of Jobs',
-        barmode='stack',
-        annotations=annotations  # Add the total annotations
-    )
-
-    st.plotly_chart(fig_type)
+    show_chart(spec, name)
+
+# Cold-start milestones and first-time imports of this process, each added to
+# the perf records of the run that first sees it
+startup.mark('first_paint')
+for stage, name, seconds in startup.unreported():
+    perf.add(stage, name, seconds)
+
+# Debug guard: the shared dataset must not have been mutated by page code
+if os.environ.get('SOMS_CHECK_STORE') and source_dataset is not None and not store.is_unchanged(source_dataset):
+    st.error(f"Shared dataset '{source_dataset.name}' was modified during the run")
+
+# Performance panel and exports
+if show_perf:
+    st.sidebar.subheader("Performance")
+    st.sidebar.caption(f"Run total: {perf.total() * 1000:,.0f} ms")
+    cache = FIGURES.stats()
+    st.sidebar.caption(f"Figure cache: {cache['hits']:,} hits, {cache['misses']:,} misses, "
+                       f"{cache['entries']} charts ({cache['bytes'] / 2**20:,.1f} MB)")
+    exports = EXPORT_FILES.stats()
+    st.sidebar.caption(f"Export files: {exports['hits']:,} reused, {exports['misses']:,} written")
+    st.sidebar.dataframe([{k: v for k, v in record.items() if k != 'page'} for record in perf.records], hide_index=True)
+    st.sidebar.caption("Startup: " + ", ".join(f"{name.replace('_', ' ')} {seconds * 1000:,.0f} ms"
+                                                for name, seconds in startup.MARKS.items()) + " after process start")
+    if startup.IMPORTS:
+        st.sidebar.dataframe([{'module': name, 'import ms': round(seconds * 1000)}
+                              for name, seconds in startup.IMPORTS.items()], hide_index=True)
+if perf_log:
+    perf.export_jsonl(perf_log)
+if perf_prom:
+    export_prometheus(perf_prom)
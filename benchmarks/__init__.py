@@ -0,0 +1 @@
+# Offline benchmarks for the SOMS dashboard pages (python -m benchmarks.run)
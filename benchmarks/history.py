@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run import parse_size  # noqa: E402
+from benchmarks.synthetic import REMARKS, status_frame  # noqa: E402
+from soms.figcache import FIGURES  # noqa: E402
+from soms.history import History, changes, series, totals  # noqa: E402
+from soms.pages.history import history_page  # noqa: E402
+from soms.perf import Recorder  # noqa: E402
+from soms.store import build_dataset  # noqa: E402
+
+
+# Project Status history on seeded synthetic versions, fully offline:
+#
+#   python -m benchmarks.history                     # 300 daily versions of 10k jobs
+#   python -m benchmarks.history --versions 1000 --rows 100k --changes 200
+#
+# Each version changes the Balance and Remark of --changes random jobs, and
+# every 10th version adds and removes a job. Reports the time to log a version,
+# the log's size against storing every version in full, and the time of the
+# history view's queries (a 90-day window and the whole history) and of the
+# full page without cached figures.
+
+SHEET = 'Project Status'
+
+
+def versions(rows, count, changed, seed):
+    # (version, frame) of count daily versions of a sheet of rows jobs
+    rng = np.random.default_rng(seed)
+    frame = build_dataset(SHEET, status_frame(rows, seed)).frame
+    for i in range(count):
+        if i:
+            picked = rng.choice(len(frame), changed, replace=False)
+            frame = frame.copy()
+            frame.loc[picked, 'Balance'] = rng.normal(5000, 20000, changed).round(2)
+            frame.loc[picked, 'Remark'] = rng.choice(REMARKS, changed)
+            if i % 10 == 0:
+                added = frame.iloc[[0]].assign(**{'Job Code': f'N{i:07d}'})
+                frame = pd.concat([frame.iloc[1:], added], ignore_index=True)
+        yield f'v{i}', frame
+
+
+def timed(function, repeat):
+    # Median seconds of repeat calls, and the last result
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the Project Status history on synthetic versions')
+    parser.add_argument('--versions', type=int, default=300)
+    parser.add_argument('--rows', default='10k', help='jobs per version')
+    parser.add_argument('--changes', type=int, default=50, help='jobs changed per version')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per query (median)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=pathlib.Path, help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        history = History(SHEET, tmp)
+        start_at = pd.Timestamp('2024-01-01').timestamp()
+        record_seconds = []
+        full_bytes = None
+        for i, (version, frame) in enumerate(versions(parse_size(args.rows), args.versions, args.changes, args.seed)):
+            dataset = build_dataset(SHEET, frame.iloc[:0])._replace(frame=frame)
+            start = time.perf_counter()
+            history.record(dataset, version, start_at + i * 86400)
+            record_seconds.append(time.perf_counter() - start)
+            if full_bytes is None:
+                full_bytes = history.stats()['bytes']
+        stats = history.stats()
+        report['record'] = dict(median=statistics.median(record_seconds), max=max(record_seconds))
+        report['log'] = dict(stats, full_bytes=full_bytes * args.versions)
+        print(f"log a version     {report['record']['median'] * 1000:>8,.1f} ms median, "
+              f"{report['record']['max'] * 1000:,.1f} ms max")
+        print(f"log size          {stats['bytes'] / 2**20:>8,.2f} MB in {stats['files']} files, {stats['rows']:,} rows "
+              f"(every version in full: {full_bytes * args.versions / 2**20:,.1f} MB)")
+
+        end = history.latest_time()
+        report['queries'] = {}
+        for name, start in (('90 days', end - pd.Timedelta(days=90)), ('all', history.first_time())):
+            read, rows = timed(lambda: history.read(['Balance'], start, end), args.repeat)
+            derive, _ = timed(lambda: (totals(rows, 'Balance', history.key),
+                                       series(rows, 'Balance', history.key,
+                                              changes(rows, 'Balance', history.key, start).index[:10])), args.repeat)
+
+            def page():
+                FIGURES.clear()
+                return history_page(history, Recorder(SHEET), window=(start.date(), end.date()))
+
+            page_seconds, _ = timed(page, args.repeat)
+            report['queries'][name] = dict(rows=len(rows), read=read, derive=derive, page=page_seconds)
+            print(f"{name:<10} read {read * 1000:>7,.1f} ms ({len(rows):,} rows), "
+                  f"trends {derive * 1000:,.1f} ms, page {page_seconds * 1000:,.1f} ms")
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=1))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
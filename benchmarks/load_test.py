@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.run import parse_size  # noqa: E402
+from benchmarks.synthetic import GENERATORS  # noqa: E402
+
+
+# Concurrent-session load test of the dashboard, fully offline:
+#
+#   python -m benchmarks.load_test                              # 1-16 sessions
+#   python -m benchmarks.load_test --concurrency 1 8 32 --duration 60 --rows 100k
+#
+# Starts `streamlit run app.py` on a free local port with the sheet URLs pointed
+# at synthetic CSV fixtures, then drives N simulated browser sessions over the
+# same websocket protocol the frontend uses. Each session switches between the
+# three sheets with exponentially distributed think times. For each concurrency
+# level the report gives rerun latency percentiles (request sent until the
+# script finished), throughput and the server's RSS, so worker counts can be
+# sized from it and cache behaviour under contention becomes visible.
+
+APP = pathlib.Path(__file__).resolve().parent.parent / 'app.py'
+URL_VARS = {
+    'Project Timeline': 'SOMS_TIMELINE_URL',
+    'Idle Manpower': 'SOMS_IDLE_URL',
+    'Project Status': 'SOMS_STATUS_URL',
+}
+
+
+def write_fixtures(directory, rows, seed):
+    # Synthetic CSV per sheet; returns the environment pointing the app at them
+    env = dict(os.environ, SOMS_CACHE_DIR=str(pathlib.Path(directory) / 'cache'))
+    for sheet, var in URL_VARS.items():
+        path = pathlib.Path(directory) / f'{var.lower()}.csv'
+        GENERATORS[sheet](rows, seed).to_csv(path, index=False)
+        env[var] = path.as_uri()
+    return env
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(env, port, timeout=60):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', str(APP),
+         '--server.headless', 'true', '--server.port', str(port),
+         '--browser.gatherUsageStats', 'false'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/_stcore/health', timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'Streamlit server did not come up on port {port}')
+
+
+def rss_mb(pid):
+    # Current resident set size of a process (Linux)
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+
+class Session:
+    # One simulated browser tab connected to the app's websocket
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.radio_id = None
+
+    async def rerun(self, sheet=None):
+        # Rerun the script, selecting sheet in the sidebar radio; returns the
+        # latency and whether the script raised
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        if sheet is not None:
+            widget = msg.rerun_script.widget_states.widgets.add()
+            widget.id = self.radio_id
+            widget.string_value = sheet
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        failed = False
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await self.ws.recv())
+            kind = reply.WhichOneof('type')
+            if kind == 'delta' and reply.delta.WhichOneof('type') == 'new_element':
+                element = reply.delta.new_element
+                if element.WhichOneof('type') == 'radio' and self.radio_id is None:
+                    self.radio_id = element.radio.id
+                failed = failed or element.WhichOneof('type') == 'exception'
+            elif kind == 'script_finished':
+                return time.perf_counter() - start, failed
+
+
+async def connect(port):
+    ws = await websockets.connect(f'ws://127.0.0.1:{port}/_stcore/stream',
+                                  subprotocols=['streamlit'], max_size=None)
+    session = Session(ws)
+    await session.rerun()
+    return session
+
+
+async def simulate(session, stop_at, think, rng, latencies, errors):
+    try:
+        while True:
+            await asyncio.sleep(rng.expovariate(1 / think) if think else 0)
+            if time.perf_counter() >= stop_at:
+                break
+            latency, failed = await session.rerun(rng.choice(list(URL_VARS)))
+            latencies.append(latency)
+            if failed:
+                errors.append(latency)
+    finally:
+        await session.ws.close()
+
+
+async def sample_rss(pid, samples):
+    while True:
+        samples.append(rss_mb(pid))
+        await asyncio.sleep(0.2)
+
+
+async def run_level(server, port, concurrency, duration, think, seed):
+    latencies, errors, rss = [], [], []
+    # Sessions open (and render their first page) before the clock starts
+    sessions = await asyncio.gather(*(connect(port) for _ in range(concurrency)))
+    sampler = asyncio.create_task(sample_rss(server.pid, rss))
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        simulate(session, start + duration, think, random.Random(seed + i), latencies, errors)
+        for i, session in enumerate(sessions)
+    ))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    return {
+        'concurrency': concurrency,
+        'reruns': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'rss_mb': rss[-1],
+        'peak_rss_mb': max(rss),
+        'errors': len(errors),
+    }
+
+
+async def run(args, server, port):
+    # First visit after startup (sheets loaded, nothing cached), then one run
+    # per sheet so every level measures a warm worker
+    session = await connect(port)
+    cold = {sheet: (await session.rerun(sheet))[0] for sheet in URL_VARS}
+    await session.ws.close()
+    print('warm-up: ' + ', '.join(f'{sheet} {seconds * 1000:,.0f} ms' for sheet, seconds in cold.items()))
+    print(f"{'sessions':>8}{'reruns':>8}{'rerun/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'RSS MB':>9}{'peak MB':>9}{'errors':>8}")
+    report = []
+    for concurrency in args.concurrency:
+        row = await run_level(server, port, concurrency, args.duration, args.think, args.seed)
+        report.append(row)
+        print(f"{row['concurrency']:>8}{row['reruns']:>8}{row['throughput']:>9.2f}"
+              f"{row['p50'] * 1000:>9.0f}{row['p95'] * 1000:>9.0f}{row['p99'] * 1000:>9.0f}"
+              f"{row['rss_mb']:>9.0f}{row['peak_rss_mb']:>9.0f}{row['errors']:>8}", flush=True)
+    return {'warm_up': cold, 'levels': report}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Concurrent-session load test of the SOMS dashboard')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 2, 4, 8, 16])
+    parser.add_argument('--duration', type=float, default=20, help='seconds per concurrency level')
+    parser.add_argument('--think', type=float, default=2.0, help='mean think time between reruns (s)')
+    parser.add_argument('--rows', default='10k', help='rows per synthetic sheet')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=pathlib.Path, help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = write_fixtures(tmp, parse_size(args.rows), args.seed)
+        port = free_port()
+        server = start_server(env, port)
+        try:
+            report = asyncio.run(run(args, server, port))
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=1))
+    return 1 if any(row['errors'] for row in report['levels']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
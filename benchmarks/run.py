@@ -0,0 +1,208 @@
+import argparse
+import gc
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import GENERATORS  # noqa: E402
+from soms.derived import PIPELINE  # noqa: E402
+from soms.exports import EXPORTS, ExportCache, FORMATS  # noqa: E402
+from soms.figcache import FIGURES  # noqa: E402
+from soms.pages import PAGES  # noqa: E402
+from soms.perf import Recorder  # noqa: E402
+from soms.snapshots import open_snapshot, read_snapshot, refresh_snapshot  # noqa: E402
+from soms.sqlstore import SqlStore  # noqa: E402
+from soms.store import build_dataset, row_count  # noqa: E402
+
+
+# Benchmark every dashboard page on seeded synthetic sheets, fully offline:
+#
+#   python -m benchmarks.run                        # 1k, 100k and 1M rows
+#   python -m benchmarks.run --sizes 1k 100k --pages "Idle Manpower"
+#   python -m benchmarks.run --update-baseline      # store a new baseline
+#   python -m benchmarks.run --backend sqlite       # sheets in SQLite (SOMS_BACKEND)
+#   python -m benchmarks.run --exports              # also write every export file (baselined too)
+#
+# Each stage (fetch, read, parse, transform, figure, serialize) reports wall
+# time, peak traced memory (measured in a second pass, since tracing slows the
+# code down) and row / payload sizes. Results are compared with the stored
+# baseline; any regression, or a stage measured but not in the baseline (or in
+# the baseline of a page, size and backend run but not measured), makes the run
+# exit with status 1. Tracing the largest sheets needs several times their
+# memory, so the traced pass only runs up to --memory-max-rows rows.
+
+BASELINE = pathlib.Path(__file__).with_name('baseline.json')
+SIZES = {'k': 1_000, 'M': 1_000_000}
+
+# A stage regresses when it is TOLERANCE times slower than the baseline (plus
+# SLACK seconds, so sub-millisecond stages do not flap) or its peak memory or
+# payload grew by more than MEMORY_TOLERANCE (plus MEMORY_SLACK bytes)
+TOLERANCE = 1.5
+SLACK = 0.005
+MEMORY_TOLERANCE = 1.2
+MEMORY_SLACK = 2**20
+
+
+def parse_size(text):
+    if text[-1] in SIZES:
+        return int(float(text[:-1]) * SIZES[text[-1]])
+    return int(text)
+
+
+def run_page(sheet, csv_url, cache_dir, trace_memory, backend='memory', exports=False):
+    # One full pass through a page, from the CSV snapshot to serialized figures.
+    # The garbage of earlier passes is collected first, so a collection does
+    # not land in (and fail) whichever short stage happens to trigger it.
+    PIPELINE.clear()
+    FIGURES.clear()
+    gc.collect()
+    perf = Recorder(sheet, trace_memory=trace_memory)
+    with perf.span('fetch', 'csv') as span:
+        refresh_snapshot(csv_url, cache_dir)
+    if backend == 'sqlite':
+        with perf.span('parse', 'sqlite') as span:
+            dataset = SqlStore(cache_dir=cache_dir).load(sheet, open_snapshot(csv_url, cache_dir)[0], 'benchmark')
+            span['rows'] = row_count(dataset)
+    else:
+        with perf.span('read', 'snapshot') as span:
+            raw = read_snapshot(csv_url, cache_dir)
+            span['rows'] = len(raw)
+        with perf.span('parse', 'schema') as span:
+            dataset = build_dataset(sheet, raw)
+            span['rows'] = len(dataset.frame)
+    PAGES[sheet](dataset, perf)
+    if exports:
+        cache = ExportCache(os.path.join(cache_dir, 'exports'), float('inf'))
+        for export in EXPORTS[sheet]:
+            for fmt in FORMATS:
+                with perf.span('export', f'{export.name}.{fmt}') as span:
+                    span['bytes'] = os.path.getsize(cache.path(dataset, export, fmt))
+    return perf.records
+
+
+def benchmark(sheet, size, seed, trace_memory_pass, backend='memory', exports=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'sheet.csv')
+        GENERATORS[sheet](size, seed).to_csv(csv_path, index=False)
+        csv_url = pathlib.Path(csv_path).as_uri()
+        records = run_page(sheet, csv_url, os.path.join(tmp, 'timed'), False, backend, exports)
+        if trace_memory_pass:
+            traced = run_page(sheet, csv_url, os.path.join(tmp, 'traced'), True, backend, exports)
+            tracemalloc.stop()
+            for record, memory in zip(records, traced):
+                record['peak_bytes'] = memory.get('peak_bytes')
+    for record in records:
+        record['size'] = size
+        record['backend'] = backend
+    return records
+
+
+def key(record):
+    suffix = '' if record.get('backend', 'memory') == 'memory' else f"|{record['backend']}"
+    return f"{record['page']}|{record['size']}|{record['stage']}|{record['name']}{suffix}"
+
+
+def run_key(name):
+    # (page, size, backend) and stage of a baseline key
+    page, size, stage, _, *backend = name.split('|')
+    return (page, int(size), backend[0] if backend else 'memory'), stage
+
+
+def regressions(results, baseline):
+    # Stages slower or larger than the baseline, stages the baseline lacks, and
+    # baseline stages of the pages, sizes and backends run (and the kinds of
+    # stage measured) that did not run, so a new or renamed stage cannot pass
+    # unchecked
+    found = []
+    measured = {key(record) for record in results}
+    runs = {((r['page'], r['size'], r.get('backend', 'memory')), r['stage']) for r in results}
+    for record in results:
+        base = baseline.get(key(record))
+        if base is None:
+            found.append(f"{key(record)}: not in the baseline (record it with --update-baseline)")
+            continue
+        if record['seconds'] > base['seconds'] * TOLERANCE + SLACK:
+            found.append(f"{key(record)}: {record['seconds']:.4f}s vs baseline {base['seconds']:.4f}s")
+        for field in ('peak_bytes', 'bytes'):
+            if record.get(field) and base.get(field) and record[field] > base[field] * MEMORY_TOLERANCE + MEMORY_SLACK:
+                found.append(f"{key(record)}: {field} {record[field]:,} vs baseline {base[field]:,}")
+    for name in sorted(baseline):
+        if name not in measured and run_key(name) in runs:
+            found.append(f"{name}: in the baseline but not measured (renamed or removed stage?)")
+    return found
+
+
+def print_table(results):
+    print(f"{'page':<18}{'rows':>10}  {'stage':<10}{'name':<15}{'seconds':>10}{'peak MB':>10}{'bytes':>14}")
+    for r in results:
+        peak = f"{r['peak_bytes'] / 2**20:.1f}" if r.get('peak_bytes') is not None else '-'
+        size = f"{r['bytes']:,}" if r.get('bytes') else '-'
+        print(f"{r['page']:<18}{r['size']:>10,}  {r['stage']:<10}{str(r['name']):<15}{r['seconds']:>10.4f}{peak:>10}{size:>14}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the SOMS dashboard pages on synthetic data')
+    parser.add_argument('--sizes', nargs='+', default=['1k', '100k', '1M'])
+    parser.add_argument('--pages', nargs='+', default=list(GENERATORS), choices=list(GENERATORS))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=['memory', 'sqlite'], default='memory',
+                        help='where sheets are held and aggregated (SOMS_BACKEND)')
+    parser.add_argument('--exports', action='store_true', help='also time writing the export files')
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced-memory pass')
+    parser.add_argument('--memory-max-rows', default='100k', help='largest size that gets the traced-memory pass')
+    parser.add_argument('--baseline', type=pathlib.Path, default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--output', type=pathlib.Path, help='also write the results as JSON')
+    args = parser.parse_args(argv)
+
+    memory_max_rows = parse_size(args.memory_max_rows)
+    # Untimed pass on a tiny sheet, so one-time import and setup costs do not
+    # land on whichever page is measured first
+    for sheet in args.pages:
+        benchmark(sheet, 100, args.seed, False, args.backend, args.exports)
+    results = []
+    for size in map(parse_size, args.sizes):
+        for sheet in args.pages:
+            start = time.perf_counter()
+            results.extend(benchmark(sheet, size, args.seed, not args.no_memory and size <= memory_max_rows,
+                                     args.backend, args.exports))
+            print(f'{sheet} @ {size:,} rows: {time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+    print_table(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=1))
+
+    if args.update_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        # Stages of the recorded runs are replaced as a whole, so renamed or
+        # removed ones do not linger
+        runs = {(r['page'], r['size'], r.get('backend', 'memory')) for r in results}
+        stages = {r['stage'] for r in results}
+        baseline = {name: base for name, base in baseline.items()
+                    if not (run_key(name)[0] in runs and run_key(name)[1] in stages)}
+        baseline.update({key(r): {k: r.get(k) for k in ('seconds', 'peak_bytes', 'bytes')} for r in results})
+        args.baseline.write_text(json.dumps(baseline, indent=1, sort_keys=True) + '\n')
+        print(f'Baseline written to {args.baseline}')
+        return 0
+
+    if not args.baseline.exists():
+        print(f'No baseline at {args.baseline}; run with --update-baseline to create one')
+        return 0
+    found = regressions(results, json.loads(args.baseline.read_text()))
+    if found:
+        print(f'\nPERFORMANCE REGRESSION OR BASELINE MISMATCH ({len(found)} stages):', file=sys.stderr)
+        for line in found:
+            print(f'  {line}', file=sys.stderr)
+        return 1
+    print('\nNo regressions against the baseline')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load_test import URL_VARS, connect, free_port, start_server, write_fixtures  # noqa: E402
+from benchmarks.run import parse_size  # noqa: E402
+
+
+# Cold-start report of the dashboard, fully offline:
+#
+#   python -m benchmarks.startup                    # import costs and first paint
+#   python -m benchmarks.startup --prerender        # first paint served from artifacts
+#   python -m benchmarks.startup --rows 100k --repeat 5 --output startup.json
+#
+# Import cost: each module the app may load, imported in a fresh interpreter on
+# top of streamlit (which every worker loads anyway), so it includes whatever
+# the module pulls in that streamlit does not. Medians of --repeat runs.
+#
+# First paint: a fresh `streamlit run app.py` on synthetic fixtures, timed from
+# process start until the server answers its health check and until the first
+# session's first script run finished (the default sheet painted), then the
+# first visit of every other sheet. The app's own startup records (soms.startup,
+# exported to SOMS_PERF_LOG) are included: first paint as measured in the
+# server and the modules it imported lazily.
+
+MODULES = [
+    'numpy', 'pandas', 'pyarrow', 'plotly.graph_objects',
+    'soms.artifacts', 'soms.refresher', 'soms.sources', 'soms.filters', 'soms.store', 'soms.sqlstore',
+    'soms.pages', 'soms.pages.timeline', 'soms.pages.idle', 'soms.pages.status', 'soms.pages.history',
+    'soms.history',
+]
+
+IMPORT_SCRIPT = '''
+import importlib, sys, time
+import streamlit
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(time.perf_counter() - start)
+'''
+
+
+def import_cost(module, repeat):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    seconds = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', IMPORT_SCRIPT, module], cwd=root,
+                             capture_output=True, text=True, check=True).stdout
+        seconds.append(float(out))
+    return statistics.median(seconds)
+
+
+async def visit(port, start):
+    # First script run of a new session (default sheet), then the first run of
+    # every other sheet
+    session = await connect(port)
+    painted = time.perf_counter() - start
+    visits = {}
+    for sheet in URL_VARS:
+        visits[sheet] = (await session.rerun(sheet))[0]
+    await session.ws.close()
+    return painted, visits
+
+
+def first_paint(env):
+    port = free_port()
+    start = time.perf_counter()
+    server = start_server(env, port)
+    try:
+        ready = time.perf_counter() - start
+        painted, visits = asyncio.run(visit(port, start))
+    finally:
+        server.terminate()
+        server.wait()
+    return {'ready': ready, 'first_paint': painted, 'first_visit': visits}
+
+
+def app_startup(perf_log):
+    # The server's own startup and import records
+    records = {}
+    if perf_log.exists():
+        for line in perf_log.read_text().splitlines():
+            record = json.loads(line)
+            if record['stage'] in ('startup', 'import'):
+                records.setdefault(record['stage'], {})[record['name']] = record['seconds']
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Cold-start report of the SOMS dashboard')
+    parser.add_argument('--modules', nargs='+', default=MODULES, help='modules to time the import of')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (median)')
+    parser.add_argument('--rows', default='10k', help='rows per synthetic sheet')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--prerender', action='store_true', help='prerender the pages before each start')
+    parser.add_argument('--output', type=pathlib.Path, help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = {'imports': {}, 'starts': []}
+    print(f"{'module':<24}{'import ms':>10}")
+    for module in args.modules:
+        report['imports'][module] = seconds = import_cost(module, args.repeat)
+        print(f'{module:<24}{seconds * 1000:>10,.0f}', flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = write_fixtures(tmp, parse_size(args.rows), args.seed)
+        perf_log = pathlib.Path(tmp) / 'perf.jsonl'
+        env['SOMS_PERF_LOG'] = str(perf_log)
+        for _ in range(args.repeat):
+            # Every start is cold: no snapshots, no artifacts
+            subprocess.run(['rm', '-rf', env['SOMS_CACHE_DIR']], check=True)
+            if args.prerender:
+                subprocess.run([sys.executable, '-m', 'soms.prerender'], env=env, check=True,
+                               cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               stdout=subprocess.DEVNULL)
+            perf_log.unlink(missing_ok=True)
+            start = first_paint(env)
+            start['app'] = app_startup(perf_log)
+            report['starts'].append(start)
+
+    starts = report['starts']
+    print(f"\nserver ready      {statistics.median(s['ready'] for s in starts) * 1000:>8,.0f} ms")
+    print(f"first paint       {statistics.median(s['first_paint'] for s in starts) * 1000:>8,.0f} ms")
+    for sheet in URL_VARS:
+        print(f"first {sheet:<18}{statistics.median(s['first_visit'][sheet] for s in starts) * 1000:>6,.0f} ms")
+    for name, seconds in starts[-1]['app'].get('startup', {}).items():
+        print(f'app {name:<14}{seconds * 1000:>8,.0f} ms (last start)')
+    for name, seconds in starts[-1]['app'].get('import', {}).items():
+        print(f'app import {name:<24}{seconds * 1000:>6,.0f} ms (last start)')
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=1))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
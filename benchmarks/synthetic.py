@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+
+# Seeded generators for the three published sheets. Values are formatted the
+# way the Google Sheets CSV exports them, so the schema parsers do real work.
+
+CLIENTS = [f'Client {i:02d}' for i in range(40)]
+SITES = [f'Site {i:02d}' for i in range(25)]
+PROJECT_TYPES = ['Civil', 'Electrical', 'Mechanical', 'HVAC', 'Plumbing', 'Fit-out']
+REMARKS = ['Completed', 'Ongoing', 'On Hold']
+
+
+def _dates(rng, n, start='2019-01-01', days=2200):
+    return pd.Timestamp(start) + pd.to_timedelta(rng.integers(0, days, n), unit='D')
+
+
+def _money_pool(rng, size=5000):
+    # Accounting-formatted amounts, negatives in parentheses, plus a few
+    # spreadsheet errors and blanks
+    values = rng.normal(5000, 20000, size)
+    pool = [f'OMR ({abs(v):,.2f})' if v < 0 else f'OMR {v:,.2f}' for v in values]
+    pool[:50] = ['#VALUE!'] * 25 + [' - '] * 25
+    return np.array(pool, dtype=object)
+
+
+def timeline_frame(n, seed=0):
+    # job_code with Expected/Actual start and end dates
+    rng = np.random.default_rng(seed)
+    expected_start = _dates(rng, n)
+    expected_end = expected_start + pd.to_timedelta(rng.integers(5, 120, n), unit='D')
+    actual_start = expected_start + pd.to_timedelta(rng.integers(-5, 20, n), unit='D')
+    actual_end = pd.Series(actual_start + pd.to_timedelta(rng.integers(5, 150, n), unit='D'))
+    actual_end[rng.random(n) < 0.3] = pd.NaT
+    return pd.DataFrame({
+        'job_code': [f'J{i:07d}' for i in range(n)],
+        'Expected Start': expected_start.strftime('%d-%b-%Y'),
+        'Expected End': expected_end.strftime('%d-%b-%Y'),
+        'Actual Start': actual_start.strftime('%d-%b-%Y'),
+        'Actual End': actual_end.dt.strftime('%Y-%m-%d'),
+    })
+
+
+def idle_frame(n, seed=0):
+    # One row per client, site and idle day
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Date': _dates(rng, n).strftime('%m/%d/%Y'),
+        'Client': rng.choice(CLIENTS, n),
+        'Site': rng.choice(SITES, n),
+        'Days Idle': rng.integers(0, 6, n),
+        'Pay Per Day': rng.integers(10, 60, n),
+    })
+
+
+def status_frame(n, seed=0):
+    # Job details, Remark and the accounting-formatted money columns
+    from soms.schema import MONEY_COLUMNS
+
+    rng = np.random.default_rng(seed)
+    pool = _money_pool(rng)
+    po_dates = _dates(rng, n).strftime('%d-%b-%Y')
+    frame = pd.DataFrame({
+        'Job Code': [f'J{i:07d}' for i in range(n)],
+        'Client Name': rng.choice(CLIENTS, n),
+        'PO received date': po_dates,
+        'Project Type': rng.choice(PROJECT_TYPES, n),
+        'S/ONO.': np.arange(n),
+        'SO DATE': po_dates,
+        'Remark': rng.choice(REMARKS, n, p=[0.55, 0.4, 0.05]),
+    })
+    for col in MONEY_COLUMNS:
+        frame[col] = rng.choice(pool, n)
+    return frame
+
+
+GENERATORS = {
+    'Project Timeline': timeline_frame,
+    'Idle Manpower': idle_frame,
+    'Project Status': status_frame,
+}
@@ -0,0 +1 @@
+# Helpers for the SOMS Streamlit dashboard (app.py)
@@ -0,0 +1,70 @@
+import datetime
+import json
+import os
+
+from soms.figcache import Spec
+from soms.pages import Page
+from soms.snapshots import CACHE_DIR, read_meta
+
+
+# Reading the prerendered pages (written by soms.prerender). Serving one needs
+# neither pandas nor plotly, so this module is all a fresh worker imports to
+# paint a prebuilt page.
+
+ARTIFACT_DIR = os.environ.get('SOMS_ARTIFACT_DIR', os.path.join(CACHE_DIR, 'artifacts'))
+MANIFEST = 'manifest.json'
+
+
+class Artifact:
+    # A prerendered page read back from disk. It also answers the sidebar's
+    # filter questions (years, months, values) like a FilterIndex, so the app
+    # needs no dataset to show it.
+
+    def __init__(self, record):
+        self.sheet = record['sheet']
+        self.version = record['version']
+        self.rows = record['rows']
+        self.parse_errors = record['parse_errors']
+        self.options = record['options']
+        self.filters = record['filters']
+        self.page = Page(record['title'], [tuple(metric) for metric in record['metrics']],
+                         [(figure['name'], Spec(figure['spec'], figure['height'])) for figure in record['figures']],
+                         record.get('notes', []))
+
+    def years(self):
+        return self.filters['years']
+
+    def months(self):
+        return self.filters.get('months', [])
+
+    def values(self, label):
+        return self.filters['values'].get(label, [])
+
+
+def read_manifest(artifact_dir=None):
+    try:
+        with open(os.path.join(artifact_dir or ARTIFACT_DIR, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def fresh_artifact(source, version=None, artifact_dir=None):
+    # Path of the sheet's latest artifact if it was built from version (the
+    # (sha256, date) the app holds), or before the app has loaded the sheet,
+    # from today's local snapshot; None otherwise
+    entry = read_manifest(artifact_dir).get(source.name)
+    if entry is None:
+        return None
+    if version is None:
+        meta = read_meta(source.url) or {}
+        version = (meta.get('sha256'), datetime.date.today())
+    if (entry['version'], entry['date']) != (version[0], version[1].isoformat()):
+        return None
+    path = os.path.join(artifact_dir or ARTIFACT_DIR, entry['path'])
+    return path if os.path.exists(path) else None
+
+
+def read_artifact(path):
+    with open(path) as f:
+        return Artifact(json.load(f))
@@ -0,0 +1,220 @@
+import numpy as np
+import pandas as pd
+
+from soms.jobindex import JobIndex
+from soms.pipeline import Pipeline
+
+
+# Derived tables behind the dashboard charts, keyed by the sheet they come from.
+# Each node has a SQL twin returning the same table when the sheet is held by
+# the SQL backend (soms.sqlstore); {rows} is the sheet's selected rows. Nodes of
+# the idle log also have a rollup twin reading its running aggregates
+# (soms.incremental.IdleRollup).
+PIPELINE = Pipeline()
+
+
+def _status_table(counts):
+    # Job counts indexed by (group, Remark) as a group x Remark table
+    status = counts.unstack(fill_value=0)
+    status.columns = status.columns.astype(str)
+    return status
+
+
+# Project Timeline
+
+@PIPELINE.node('timeline_jobs', inputs=['Project Timeline'])
+def timeline_jobs(df):
+    # Jobs with both expected dates and an actual start
+    df_filtered = df.dropna(subset=['Expected Start', 'Expected End'])
+    return df_filtered[~df_filtered['Actual Start'].isna()]
+
+
+@PIPELINE.query('timeline_jobs', root='Project Timeline')
+def timeline_jobs_sql(table):
+    return table.read('SELECT * FROM {rows} WHERE "Expected Start" IS NOT NULL '
+                      'AND "Expected End" IS NOT NULL AND "Actual Start" IS NOT NULL ORDER BY _row')
+
+
+@PIPELINE.node('timeline_range', inputs=['Project Timeline'])
+def timeline_range(df):
+    # Date axis range of the timeline chart
+    return [df['Expected Start'].min(), df['Expected End'].max()]
+
+
+@PIPELINE.query('timeline_range', root='Project Timeline')
+def timeline_range_sql(table):
+    bounds = table.read('SELECT MIN("Expected Start") AS "Expected Start", MAX("Expected End") AS "Expected End" FROM {rows}')
+    return [bounds['Expected Start'][0], bounds['Expected End'][0]]
+
+
+@PIPELINE.node('timeline_index', inputs=['timeline_jobs'])
+def timeline_index(df_jobs):
+    # Display order and lookups of the windowed Gantt chart
+    return JobIndex(df_jobs)
+
+
+# Idle Manpower
+
+@PIPELINE.node('daily_idle', inputs=['Idle Manpower'])
+def daily_idle(df):
+    return df.groupby('Date').agg({'Idle Manhours': 'sum'}).reset_index()
+
+
+@PIPELINE.query('daily_idle', root='Idle Manpower')
+def daily_idle_sql(table):
+    return table.read('SELECT "Date", COALESCE(SUM("Idle Manhours"), 0) AS "Idle Manhours" FROM {rows} '
+                      'WHERE "Date" IS NOT NULL GROUP BY "Date" ORDER BY "Date"')
+
+
+@PIPELINE.rollup('daily_idle', root='Idle Manpower')
+def daily_idle_rollup(rollup):
+    return rollup.daily.rename('Idle Manhours').rename_axis('Date').reset_index()
+
+
+@PIPELINE.node('idle_metrics', inputs=['Idle Manpower', 'daily_idle'])
+def idle_metrics(df, df_daily_idle):
+    return {
+        'average_idle_manhours': df_daily_idle['Idle Manhours'].mean(),
+        'avg_cost_of_idle_time': df['Pay Per Day'].mean().round(0),
+        'total_idle_mandays': df['Days Idle'].sum(),
+    }
+
+
+@PIPELINE.query('idle_metrics', root='Idle Manpower')
+def idle_metrics_sql(table):
+    row = table.read('SELECT (SELECT AVG(total) FROM (SELECT COALESCE(SUM("Idle Manhours"), 0) AS total FROM {rows} '
+                     'WHERE "Date" IS NOT NULL GROUP BY "Date")) AS average_idle_manhours, '
+                     'AVG("Pay Per Day") AS avg_cost_of_idle_time, '
+                     'COALESCE(SUM("Days Idle"), 0) AS total_idle_mandays FROM {rows}')
+    metrics = {key: row[key][0] for key in row.columns}
+    # Rounded here: SQLite's ROUND takes halves away from zero, pandas to even
+    metrics['avg_cost_of_idle_time'] = np.round(row['avg_cost_of_idle_time'].astype(float)[0], 0)
+    return metrics
+
+
+@PIPELINE.rollup('idle_metrics', root='Idle Manpower')
+def idle_metrics_rollup(rollup):
+    return {
+        'average_idle_manhours': rollup.daily.mean(),
+        'avg_cost_of_idle_time': np.round(rollup.cost / rollup.cost_count, 0) if rollup.cost_count else np.nan,
+        'total_idle_mandays': rollup.days_idle,
+    }
+
+
+@PIPELINE.node('client_idle', inputs=['Idle Manpower'])
+def client_idle(df):
+    return (df.groupby('Client', observed=True).agg({'Idle Manhours': 'sum'}).reset_index()
+            .sort_values(by='Idle Manhours', ascending=False))
+
+
+@PIPELINE.query('client_idle', root='Idle Manpower')
+def client_idle_sql(table):
+    return table.read('SELECT "Client", COALESCE(SUM("Idle Manhours"), 0) AS "Idle Manhours" FROM {rows} '
+                      'WHERE "Client" IS NOT NULL GROUP BY "Client" ORDER BY "Idle Manhours" DESC')
+
+
+@PIPELINE.rollup('client_idle', root='Idle Manpower')
+def client_idle_rollup(rollup):
+    return (rollup.client_manhours.rename('Idle Manhours').rename_axis('Client').reset_index()
+            .sort_values(by='Idle Manhours', ascending=False))
+
+
+def _with_total(df_client_cost, cost_of_idle_time):
+    total_row = pd.DataFrame({'Client': ['Total'], 'Pay Per Day': [cost_of_idle_time]})
+    return pd.concat([df_client_cost, total_row], ignore_index=True)
+
+
+@PIPELINE.node('client_cost', inputs=['Idle Manpower'])
+def client_cost(df):
+    # Cost of idle time per client followed by a 'Total' row for the waterfall
+    cost_of_idle_time = df['Pay Per Day'].sum().round(2)
+    df_client_cost = (df.groupby('Client', observed=True).agg({'Pay Per Day': 'sum'}).reset_index()
+                      .sort_values(by='Pay Per Day', ascending=False))
+    df_client_cost['Client'] = df_client_cost['Client'].astype(object)
+    return _with_total(df_client_cost, cost_of_idle_time)
+
+
+@PIPELINE.query('client_cost', root='Idle Manpower')
+def client_cost_sql(table):
+    df_client_cost = table.read('SELECT "Client", COALESCE(SUM("Pay Per Day"), 0) AS "Pay Per Day" FROM {rows} '
+                                'WHERE "Client" IS NOT NULL GROUP BY "Client" ORDER BY "Pay Per Day" DESC')
+    total = table.read('SELECT COALESCE(SUM("Pay Per Day"), 0) AS total FROM {rows}')['total'][0]
+    return _with_total(df_client_cost, np.round(total, 2))
+
+
+@PIPELINE.rollup('client_cost', root='Idle Manpower')
+def client_cost_rollup(rollup):
+    df_client_cost = (rollup.client_cost.rename('Pay Per Day').rename_axis('Client').reset_index()
+                      .sort_values(by='Pay Per Day', ascending=False))
+    return _with_total(df_client_cost, np.round(rollup.cost, 2))
+
+
+# Project Status
+
+@PIPELINE.node('status_counts', inputs=['Project Status'])
+def status_counts(df):
+    return {
+        'total_jobs': df['Job Code'].count(),
+        'completed_jobs': int((df['Remark'] == 'Completed').sum()),
+        'ongoing_jobs': int((df['Remark'] == 'Ongoing').sum()),
+    }
+
+
+@PIPELINE.query('status_counts', root='Project Status')
+def status_counts_sql(table):
+    row = table.read('SELECT COUNT("Job Code") AS total_jobs, '
+                     'COALESCE(SUM("Remark" = \'Completed\'), 0) AS completed_jobs, '
+                     'COALESCE(SUM("Remark" = \'Ongoing\'), 0) AS ongoing_jobs FROM {rows}').iloc[0]
+    return {key: int(value) for key, value in row.items()}
+
+
+@PIPELINE.node('remark_counts', inputs=['Project Status'])
+def remark_counts(df):
+    counts = df['Remark'].value_counts()
+    return counts[counts > 0]
+
+
+@PIPELINE.query('remark_counts', root='Project Status')
+def remark_counts_sql(table):
+    counts = table.read('SELECT "Remark", COUNT(*) AS count FROM {rows} WHERE "Remark" IS NOT NULL '
+                        'GROUP BY "Remark" ORDER BY count DESC')
+    return counts.set_index('Remark')['count']
+
+
+def _ongoing_status(status, ongoing_clients):
+    for remark in ('Completed', 'Ongoing'):
+        if remark not in status.columns:
+            status[remark] = 0
+    status = status.loc[ongoing_clients]
+    return status.assign(**{'Total Jobs': status.sum(axis=1)})
+
+
+@PIPELINE.node('client_status', inputs=['Project Status'])
+def client_status(df):
+    # Completed/Ongoing job counts for clients that still have ongoing jobs
+    status = _status_table(df.groupby(['Client Name', 'Remark'], observed=True).size())
+    ongoing_clients = df.loc[df['Remark'] == 'Ongoing', 'Client Name'].unique()
+    return _ongoing_status(status, ongoing_clients)
+
+
+@PIPELINE.query('client_status', root='Project Status')
+def client_status_sql(table):
+    counts = table.read('SELECT "Client Name", "Remark", COUNT(*) AS jobs FROM {rows} '
+                        'WHERE "Client Name" IS NOT NULL AND "Remark" IS NOT NULL GROUP BY 1, 2')
+    # Clients in order of their first ongoing job, like Series.unique
+    ongoing = table.read('SELECT "Client Name" FROM {rows} WHERE "Remark" = \'Ongoing\' '
+                         'AND "Client Name" IS NOT NULL GROUP BY 1 ORDER BY MIN(_row)')
+    status = _status_table(counts.set_index(['Client Name', 'Remark'])['jobs'])
+    return _ongoing_status(status, ongoing['Client Name'].tolist())
+
+
+@PIPELINE.node('type_status', inputs=['Project Status'])
+def type_status(df):
+    return _status_table(df.groupby(['Project Type', 'Remark'], observed=True).size())
+
+
+@PIPELINE.query('type_status', root='Project Status')
+def type_status_sql(table):
+    counts = table.read('SELECT "Project Type", "Remark", COUNT(*) AS jobs FROM {rows} '
+                        'WHERE "Project Type" IS NOT NULL AND "Remark" IS NOT NULL GROUP BY 1, 2')
+    return _status_table(counts.set_index(['Project Type', 'Remark'])['jobs'])
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+# Time buckets from finest to coarsest: (name, resample rule, approximate days)
+GRANULARITIES = [('Day', 'D', 1), ('Week', 'W-MON', 7), ('Month', 'MS', 30.44), ('Quarter', 'QS', 91.31)]
+
+# Most points a line chart gets (about one per horizontal pixel), and the most
+# points that still have room for a text label each
+PIXEL_BUDGET = 800
+LABEL_BUDGET = 60
+
+
+def choose_granularity(start, end, budget=PIXEL_BUDGET):
+    # Finest bucket size that keeps the visible range within the point budget
+    days = (end - start).days + 1
+    for name, _, bucket_days in GRANULARITIES:
+        if days / bucket_days <= budget:
+            return name
+    return GRANULARITIES[-1][0]
+
+
+def bucket(daily, granularity, date_col='Date', value_col='Idle Manhours'):
+    # Re-aggregate a daily rollup into day/week/month/quarter totals; weeks are
+    # labelled by their Monday, months and quarters by their first day
+    if granularity == 'Day':
+        return daily[[date_col, value_col]]
+    rule = next(rule for name, rule, _ in GRANULARITIES if name == granularity)
+    series = daily.set_index(date_col)[value_col]
+    return series.resample(rule, label='left', closed='left').sum().rename_axis(date_col).reset_index()
+
+
+def lttb(x, y, threshold):
+    # Largest-Triangle-Three-Buckets: indices of threshold points that preserve
+    # the visual shape of the (x, y) line. x must be numeric and increasing.
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    selected = np.empty(threshold, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket is the third triangle vertex
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_lo:next_hi].mean() if next_hi > next_lo else x[-1]
+        avg_y = y[next_lo:next_hi].mean() if next_hi > next_lo else y[-1]
+        area = np.abs((x[previous] - avg_x) * (y[lo:hi] - y[previous])
+                      - (x[previous] - x[lo:hi]) * (avg_y - y[previous]))
+        previous = lo + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def idle_series(daily, granularity='Auto', budget=PIXEL_BUDGET, date_col='Date', value_col='Idle Manhours'):
+    # Points for the idle manhours line chart: bucketed at the requested (or
+    # automatically chosen) granularity, then LTTB-downsampled to the budget.
+    # Returns (points, granularity, downsampled).
+    daily = daily.dropna(subset=[date_col])
+    if daily.empty:
+        return daily[[date_col, value_col]], 'Day', False
+    if granularity == 'Auto':
+        granularity = choose_granularity(daily[date_col].min(), daily[date_col].max(), budget)
+    points = bucket(daily, granularity, date_col, value_col)
+    if len(points) <= budget:
+        return points, granularity, False
+    x = points[date_col].to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(float)
+    y = points[value_col].to_numpy(dtype=float)
+    return points.iloc[lttb(x, y, budget)], granularity, True
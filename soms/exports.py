@@ -0,0 +1,181 @@
+import hashlib
+import os
+import threading
+from collections import namedtuple
+
+from soms.snapshots import CACHE_DIR
+
+
+# Downloadable tables of each page as Excel or Parquet files. The rows are
+# written chunk by chunk by streaming writers (openpyxl's write-only workbooks,
+# one Parquet row group per chunk), so memory stays flat however many rows an
+# export has: the shared frame is only sliced, and SQL-backed sheets are read a
+# chunk at a time. Files are cached on disk by the dataset fingerprint, so
+# repeated downloads of unchanged data are served as they are.
+
+# An export of a page: file name, button caption, the derived table it holds
+# (None for the sheet's rows after the filters) and a transform of each chunk
+Export = namedtuple('Export', ['name', 'label', 'table', 'transform'], defaults=[None, None])
+
+CHUNK_ROWS = 50_000
+
+# Data rows per worksheet (Excel's limit less the header); longer exports
+# continue on further worksheets
+XLSX_ROWS = 1_048_575
+
+FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def _timeline_delays(chunk):
+    # Days each job started and finished behind plan (negative when ahead); open
+    # jobs end today, so their end delay is the delay so far
+    return chunk.assign(**{
+        'Start Delay (days)': (chunk['Actual Start'] - chunk['Expected Start']).dt.days,
+        'End Delay (days)': (chunk['Actual End'] - chunk['Expected End']).dt.days,
+    })
+
+
+EXPORTS = {
+    'Project Timeline': [Export('timeline', 'Timeline with delays', None, _timeline_delays)],
+    'Idle Manpower': [Export('daily_idle', 'Daily idle manhours', 'daily_idle'),
+                      Export('client_cost', 'Idle cost per client', 'client_cost')],
+    'Project Status': [Export('project_status', 'Project status', None)],
+}
+
+
+def _slices(frame, chunk_rows):
+    # Views of at most chunk_rows rows (at least one, possibly empty)
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def iter_export(dataset, export, chunk_rows=CHUNK_ROWS):
+    # The export's rows as frames of at most chunk_rows rows
+    if export.table is not None:
+        from soms.derived import PIPELINE
+
+        chunks = _slices(PIPELINE.compute(export.table, {dataset.name: dataset}), chunk_rows)
+    elif dataset.table is not None:
+        chunks = dataset.table.chunks(chunk_rows)
+    else:
+        chunks = _slices(dataset.frame, chunk_rows)
+    for chunk in chunks:
+        yield export.transform(chunk) if export.transform else chunk
+
+
+def write_xlsx(chunks, path):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = header = None
+    rows = 0
+    for chunk in chunks:
+        if header is None:
+            header = [str(col) for col in chunk.columns]
+            sheet = workbook.create_sheet('Data')
+            sheet.append(header)
+        # Plain Python values, missing cells empty
+        for row in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False, name=None):
+            if rows == XLSX_ROWS:
+                sheet = workbook.create_sheet(f'Data {len(workbook.worksheets) + 1}')
+                sheet.append(header)
+                rows = 0
+            sheet.append(row)
+            rows += 1
+    workbook.save(path)
+
+
+def write_parquet(chunks, path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                # Columns without a value in the first chunk hold text
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                schema = pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                    for field in schema], metadata=schema.metadata)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {
+    'xlsx': write_xlsx,
+    'parquet': write_parquet,
+}
+
+
+class ExportCache:
+    # Export files under directory, named by the dataset fingerprint, export and
+    # format. Each file is written once per process (concurrent requests wait
+    # for it) and atomically, so workers sharing the directory never read a
+    # partial file. Least recently used files are removed once the directory
+    # holds more than max_bytes.
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writing = {}
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, dataset, export, fmt):
+        # Path of the export file of dataset, written unless already cached
+        key = hashlib.sha1(f'{dataset.fingerprint}|{export.name}|{fmt}'.encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(self.directory, f'{export.name}-{key}.{fmt}')
+        with self._lock:
+            lock = self._writing.setdefault(path, threading.Lock())
+        with lock:
+            if os.path.exists(path):
+                # Touched, so eviction goes by last use
+                os.utime(path)
+                self.hits += 1
+                return path
+            self.misses += 1
+            os.makedirs(self.directory, exist_ok=True)
+            tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+            try:
+                WRITERS[fmt](iter_export(dataset, export), tmp)
+                os.replace(tmp, path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        self._evict(path)
+        return path
+
+    def _evict(self, keep):
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.tmp') and path != keep:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files) + os.path.getsize(keep)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses)
+
+
+# Process-wide export cache in SOMS_EXPORT_DIR, capped by SOMS_EXPORT_CACHE_MB
+EXPORT_DIR = os.environ.get('SOMS_EXPORT_DIR', os.path.join(CACHE_DIR, 'exports'))
+EXPORT_FILES = ExportCache(EXPORT_DIR, int(os.environ.get('SOMS_EXPORT_CACHE_MB', 512)) * 2**20)
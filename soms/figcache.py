@@ -0,0 +1,67 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+
+# A serialized chart: the Plotly JSON spec and its layout height in pixels
+# (None for Plotly's default), so it can be rendered without parsing the spec
+Spec = namedtuple('Spec', ['json', 'height'])
+
+
+class FigureCache:
+    # Serialized figures keyed by the data they were built from and the chart
+    # parameters. Least recently used specs are evicted once their total size
+    # exceeds max_bytes; a spec larger than the whole cache is not stored.
+    # Shared between sessions of the process.
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(fingerprint, name, params=()):
+        return hashlib.sha1(f'{fingerprint}|{name}|{params!r}'.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is None:
+                self.misses += 1
+                return None
+            self._specs.move_to_end(key)
+            self.hits += 1
+            return spec
+
+    def put(self, key, spec):
+        size = len(spec.json)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._specs:
+                self.size -= len(self._specs.pop(key).json)
+            self._specs[key] = spec
+            self.size += size
+            while self.size > self.max_bytes:
+                _, evicted = self._specs.popitem(last=False)
+                self.size -= len(evicted.json)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
+            self.size = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(entries=len(self._specs), bytes=self.size, hits=self.hits,
+                        misses=self.misses, evictions=self.evictions)
+
+
+# Process-wide figure cache, capped by SOMS_FIGURE_CACHE_MB (0 disables it)
+FIGURES = FigureCache(int(os.environ.get('SOMS_FIGURE_CACHE_MB', 256)) * 2**20)
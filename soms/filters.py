@@ -0,0 +1,160 @@
+import calendar
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from soms.store import Dataset
+
+
+# Filterable columns per sheet: (date column for Year/Month, {label: category column})
+FILTERS = {
+    'Project Timeline': ('Expected Start', {}),
+    'Idle Manpower': ('Date', {'Client': 'Client', 'Site': 'Site'}),
+    'Project Status': (None, {'Client': 'Client Name'}),
+}
+
+MONTHS = list(calendar.month_name)[1:]
+
+
+def _date_ranges(years, month):
+    # [start, end) of the month in each year, or of each whole year
+    month_number = MONTHS.index(month) + 1 if month else None
+    ranges = []
+    for y in years:
+        if month_number:
+            start = pd.Timestamp(y, month_number, 1)
+            ranges.append((start, start + pd.offsets.MonthBegin(1)))
+        else:
+            ranges.append((pd.Timestamp(y, 1, 1), pd.Timestamp(y + 1, 1, 1)))
+    return ranges
+
+
+class FilterIndex:
+    # Precomputed lookups for one dataset: a sorted date index, so a Year/Month
+    # filter is a binary-search slice, and per-value row positions for each
+    # category column. Filtering never scans the full frame.
+
+    def __init__(self, df, date_col, category_cols):
+        self.size = len(df)
+        self.dates = None
+        if date_col and date_col in df.columns:
+            values = df[date_col].to_numpy(dtype='datetime64[ns]')
+            valid = np.flatnonzero(~np.isnat(values))
+            order = valid[np.argsort(values[valid], kind='stable')]
+            self.order = order
+            self.dates = values[order]
+
+        self.positions = {}
+        for label, col in category_cols.items():
+            if col not in df.columns:
+                continue
+            categorical = pd.Categorical(df[col])
+            codes = categorical.codes
+            order = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[order], np.arange(len(categorical.categories) + 1))
+            self.positions[label] = {
+                value: order[bounds[i]:bounds[i + 1]]
+                for i, value in enumerate(categorical.categories)
+                if bounds[i + 1] > bounds[i]
+            }
+
+    def years(self):
+        if self.dates is None or not len(self.dates):
+            return []
+        return list(range(pd.Timestamp(self.dates[0]).year, pd.Timestamp(self.dates[-1]).year + 1))
+
+    def months(self):
+        return MONTHS if self.years() else []
+
+    def values(self, label):
+        return list(self.positions.get(label, {}))
+
+    def _date_slice(self, start, end):
+        lo, hi = np.searchsorted(self.dates, [np.datetime64(start, 'ns'), np.datetime64(end, 'ns')])
+        return self.order[lo:hi]
+
+    def _date_positions(self, year, month):
+        slices = [self._date_slice(start, end) for start, end in _date_ranges([year] if year else self.years(), month)]
+        return np.concatenate(slices) if slices else np.array([], dtype=np.intp)
+
+    def select(self, year=None, month=None, **categories):
+        # Sorted row positions matching every given filter (None means all)
+        selected = []
+        if self.dates is not None and (year or month):
+            selected.append(self._date_positions(year, month))
+        for label, value in categories.items():
+            if value is not None and label in self.positions:
+                selected.append(self.positions[label].get(value, np.array([], dtype=np.intp)))
+        if not selected:
+            return None
+        # Intersect starting from the smallest candidate set
+        selected.sort(key=len)
+        positions = np.sort(selected[0])
+        for other in selected[1:]:
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
+
+
+class SqlFilterIndex:
+    # FilterIndex for a SQL-backed dataset: the lookups are read once from the
+    # table's indexes and a selection becomes a WHERE clause
+
+    def __init__(self, table, date_col, category_cols):
+        columns = table.columns()
+        self.date_col = date_col if date_col in columns else None
+        self.category_cols = {label: col for label, col in category_cols.items() if col in columns}
+        self._years = []
+        if self.date_col:
+            bounds = table.read(f'SELECT MIN("{date_col}") AS lo, MAX("{date_col}") AS hi FROM {{rows}}').iloc[0]
+            if not pd.isna(bounds['lo']):
+                lo, hi = pd.to_datetime(bounds['lo'], unit='ns'), pd.to_datetime(bounds['hi'], unit='ns')
+                self._years = list(range(lo.year, hi.year + 1))
+        self._values = {
+            label: table.read(f'SELECT DISTINCT "{col}" FROM {{rows}} WHERE "{col}" IS NOT NULL ORDER BY 1')[col].tolist()
+            for label, col in self.category_cols.items()
+        }
+
+    def years(self):
+        return self._years
+
+    def months(self):
+        return MONTHS if self._years else []
+
+    def values(self, label):
+        return self._values.get(label, [])
+
+    def select(self, year=None, month=None, **categories):
+        # (SQL condition, params) matching every given filter (None means all)
+        clauses, params = [], []
+        if self.date_col and (year or month):
+            ranges = _date_ranges([year] if year else self.years(), month)
+            clauses.append('(' + (' OR '.join([f'("{self.date_col}" >= ? AND "{self.date_col}" < ?)'] * len(ranges)) or '0') + ')')
+            params += [int(bound.value) for bounds in ranges for bound in bounds]
+        for label, value in categories.items():
+            if value is not None and label in self.category_cols:
+                clauses.append(f'"{self.category_cols[label]}" = ?')
+                params.append(value)
+        if not clauses:
+            return None
+        return ' AND '.join(clauses), params
+
+
+def build_index(dataset):
+    date_col, category_cols = FILTERS.get(dataset.name, (None, {}))
+    if dataset.table is not None:
+        return SqlFilterIndex(dataset.table, date_col, category_cols)
+    return FilterIndex(dataset.frame, date_col, category_cols)
+
+
+def filter_dataset(dataset, index, **selection):
+    # Dataset restricted to the selected rows, fingerprinted by its parent and the
+    # selection so derived tables are memoized per filter combination
+    selected = index.select(**selection)
+    if selected is None:
+        return dataset
+    key = repr(sorted(selection.items()))
+    fingerprint = hashlib.sha1(f'{dataset.fingerprint}:{key}'.encode('utf-8')).hexdigest()
+    if dataset.table is not None:
+        return dataset._replace(fingerprint=fingerprint, table=dataset.table.restrict(*selected))
+    return Dataset(dataset.name, dataset.frame.take(selected), dataset.parse_errors, fingerprint)
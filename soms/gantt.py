@@ -0,0 +1,95 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+# Label styles for the four date labels drawn around each job bar
+# (column, text position, font size, color)
+LABELS = [
+    ('Expected Start', 'top left', 7, 'orange'),
+    ('Expected End', 'top right', 8, 'orange'),
+    ('Actual Start', 'bottom left', 7, 'red'),
+    ('Actual End', 'bottom right', 7, 'red'),
+]
+
+MONTH_ABBR = np.array(['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
+
+
+def _days(dates):
+    return dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]')
+
+
+def _iso(days):
+    # 'YYYY-MM-DD' strings; NaT stays 'NaT', which Plotly treats as a gap
+    return np.datetime_as_string(days, unit='D')
+
+
+def _short(days):
+    # Vectorized '%b %d' formatting, e.g. 'Mar 07'
+    if not len(days):
+        return np.array([], dtype=str)
+    months = days.astype('datetime64[M]')
+    day = (days - months.astype('datetime64[D]')).astype(np.int64) + 1
+    label = np.char.add(MONTH_ABBR[months.astype(np.int64) % 12], ' ')
+    return np.char.add(label, np.char.zfill(day.astype('U2'), 2))
+
+
+def _bar_trace(df, start_col, end_col, label, color, width):
+    # Every bar of one kind in a single trace: [start, end, gap] per job, where
+    # the NaT gap point breaks the line between jobs
+    rows = df[df[start_col].notna() & df[end_col].notna()]
+    starts, ends = _days(rows[start_col]), _days(rows[end_col])
+    jobs = rows['job_code'].to_numpy(dtype=str)
+    hover = np.char.add(np.char.add(f'{label}: ', _short(starts)), np.char.add(' to ', _short(ends)))
+
+    x = np.empty(len(rows) * 3, dtype='datetime64[D]')
+    x[0::3], x[1::3], x[2::3] = starts, ends, np.datetime64('NaT')
+    return go.Scatter(
+        x=_iso(x),
+        y=np.repeat(jobs, 3),
+        mode='lines+markers',
+        line=dict(color=color, width=width),
+        name=label,
+        hoverinfo='text',
+        text=np.repeat(hover, 3),
+    )
+
+
+def _label_trace(df, col, position, size, color):
+    # Date labels for one of the four label styles; per-point style arrays would
+    # be validated element by element by Plotly, so each style gets its own trace
+    rows = df[df[col].notna()]
+    days = _days(rows[col])
+    return go.Scatter(
+        x=_iso(days),
+        y=rows['job_code'].to_numpy(dtype=str),
+        mode='text',
+        text=_short(days),
+        textposition=position,
+        textfont=dict(size=size, color=color),
+        hoverinfo='skip',
+    )
+
+
+def build_gantt(df_filtered, x_range):
+    # Gantt chart of Expected vs Actual dates with a fixed number of traces
+    # (Expected bars, Actual bars, four date label styles) regardless of job
+    # count; jobs run top to bottom in frame order
+    fig = go.Figure()
+    fig.add_trace(_bar_trace(df_filtered, 'Expected Start', 'Expected End', 'Expected', 'orange', 15))
+    fig.add_trace(_bar_trace(df_filtered, 'Actual Start', 'Actual End', 'Actual', 'red', 5))
+    for label in LABELS:
+        fig.add_trace(_label_trace(df_filtered, *label))
+
+    fig.update_layout(
+        title='Gantt Chart: Expected vs Actual Dates',
+        xaxis_title='Date',
+        yaxis_title='Job Code',
+        xaxis=dict(type='date', tickformat='%b %Y'),
+        xaxis_range=x_range,
+        yaxis=dict(type='category', autorange='reversed'),
+        showlegend=False,
+        legend=dict(yanchor="bottom", y=1.02, xanchor="right", x=1),
+        height=400 + len(df_filtered) * 20,  # Dynamic height based on the number of tasks
+        margin=dict(l=0, r=0, t=40, b=0)
+    )
+    return fig
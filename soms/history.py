@@ -0,0 +1,305 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from soms.schema import MONEY_COLUMNS, SCHEMAS
+from soms.snapshots import CACHE_DIR, fcntl
+
+
+# History of a sheet's versions as a change log of Parquet files, one row per
+# changed row: each new version only adds the rows whose values differ from the
+# previous version per key (Job Code), plus a row marking each key that was
+# removed, stamped with the version's time. Storage grows with what changed,
+# not with the number of refreshes, and the state at any time is rebuilt from
+# the last row per key up to it.
+#
+# Files are named <first>-<last>.parquet by the nanosecond times they cover, so
+# a query skips the files after its time range (and, for the state at its start,
+# reads the earlier ones) and reads only the columns it asks for. Each version
+# is written as its own file and row group; once there are COMPACT_FILES of them
+# they are merged into one file, keeping a row group per version so the time
+# filter still skips whole groups. latest.parquet holds
+# the current rows with a hash of each, so a new version is diffed without
+# reading the log. The directory is shared by every worker on the machine.
+
+HISTORY_DIR = os.environ.get('SOMS_HISTORY_DIR', os.path.join(CACHE_DIR, 'history'))
+COMPACT_FILES = int(os.environ.get('SOMS_HISTORY_COMPACT', 64))
+
+TIME = 'Snapshot'
+REMOVED = 'Removed'
+HASH = '_hash'
+LATEST = 'latest.parquet'
+
+# Columns the history view can chart
+VALUE_COLUMNS = MONEY_COLUMNS
+
+
+def _span(name):
+    # (first, last) nanosecond times of a log file, None for other files
+    first, sep, last = name[:-len('.parquet')].partition('-')
+    if not name.endswith('.parquet') or not sep or not (first.isdigit() and last.isdigit()):
+        return None
+    return int(first), int(last)
+
+
+class History:
+    # The change log of one sheet under directory/<sheet name>, keyed by key
+
+    def __init__(self, sheet, directory=None, key='Job Code'):
+        self.sheet = sheet
+        self.key = key
+        self.directory = os.path.join(directory or HISTORY_DIR, sheet.lower().replace(' ', '_'))
+
+    @contextmanager
+    def _lock(self):
+        # Exclusive across processes while a version is recorded
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def files(self):
+        # [(first, last, path)] of the log files in time order
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(span + (os.path.join(self.directory, name),)
+                      for name, span in ((name, _span(name)) for name in names) if span)
+
+    @property
+    def fingerprint(self):
+        # Changes whenever a version with changes is recorded or files are merged
+        return '|'.join(os.path.basename(path) for _, _, path in self.files())
+
+    def _meta(self):
+        # Metadata of the last recorded version ({} before the first)
+        path = os.path.join(self.directory, LATEST)
+        if not os.path.exists(path):
+            return {}
+        return json.loads(pq.read_schema(path).metadata[b'soms'])
+
+    def _latest(self):
+        # Current rows with their hashes, None before the first version
+        path = os.path.join(self.directory, LATEST)
+        return pq.read_table(path).to_pandas() if os.path.exists(path) else None
+
+    def first_time(self):
+        # Time of the first recorded version, None before it
+        files = self.files()
+        return pd.Timestamp(files[0][0]) if files else None
+
+    def latest_time(self):
+        # Time of the last recorded version, None before the first
+        at = self._meta().get('at')
+        return None if at is None else pd.Timestamp(at)
+
+    def keys(self):
+        # Keys of the current rows, sorted
+        path = os.path.join(self.directory, LATEST)
+        if not os.path.exists(path):
+            return []
+        return sorted(pq.read_table(path, columns=[self.key]).column(0).drop_null().to_pylist())
+
+    def _rows(self, dataset):
+        # The dataset's rows with a key, the last row per key. Categories and
+        # the columns the sheet's schema does not type are kept as text, so the
+        # log's column types do not change with the values.
+        frame = dataset.frame if dataset.table is None else dataset.table.read('SELECT * FROM {rows}')
+        frame = frame[frame[self.key].notna()].drop_duplicates(self.key, keep='last')
+        typed = {column.name for column in SCHEMAS.get(self.sheet, []) if column.kind != 'category'}
+        frame = frame.astype({col: str for col in frame.columns if col not in typed})
+        return frame.reset_index(drop=True)
+
+    def record(self, dataset, version, at=None):
+        # Log the rows of dataset (a new version of the sheet, identified by
+        # version, seen at the epoch seconds at) that differ from the last
+        # recorded version. Returns the number of rows logged, None when version
+        # was already recorded.
+        if self._meta().get('version') == version:
+            return None
+        rows = self._rows(dataset)
+        rows[HASH] = pd.util.hash_pandas_object(rows, index=False).to_numpy()
+        at = int((time.time() if at is None else at) * 1e9)
+        with self._lock():
+            # Another process may have logged it meanwhile
+            meta = self._meta()
+            if meta.get('version') == version:
+                return None
+            latest = self._latest()
+            # Versions stay in time order even if clocks disagree
+            at = max(at, meta.get('at', 0) + 1)
+            if latest is None:
+                changes = rows.assign(**{REMOVED: False})
+            else:
+                # Rows are unchanged when their key's row in the last version has
+                # the same hash (keys matched as objects, which is faster than
+                # on Arrow-backed strings)
+                keys = pd.Index(rows[self.key].to_numpy(dtype=object))
+                previous = pd.Index(latest[self.key].to_numpy(dtype=object)).get_indexer(keys)
+                unchanged = (previous >= 0) & (latest[HASH].to_numpy()[previous] == rows[HASH].to_numpy())
+                removed = latest[keys.get_indexer(latest[self.key].to_numpy(dtype=object)) < 0]
+                changes = pd.concat([rows[~unchanged].assign(**{REMOVED: False}),
+                                     removed.assign(**{REMOVED: True})], ignore_index=True)
+            changes = changes.drop(columns=HASH)
+            if len(changes):
+                # TIME first, where _scan finds its row group statistics
+                changes.insert(0, TIME, pd.Series(pd.Timestamp(at), index=changes.index, dtype='datetime64[ns]'))
+                self._write(os.path.join(self.directory, f'{at}-{at}.parquet'),
+                            pa.Table.from_pandas(changes, preserve_index=False))
+            table = pa.Table.from_pandas(rows, preserve_index=False)
+            table = table.replace_schema_metadata({b'soms': json.dumps({'version': version, 'at': at})})
+            self._write(os.path.join(self.directory, LATEST), table)
+            self._compact()
+        return len(changes)
+
+    def _write(self, path, table):
+        # Atomically; columns without a value hold text
+        table = table.cast(pa.schema([field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                                      for field in table.schema], metadata=table.schema.metadata))
+        tmp = f'{path}.{os.getpid()}.tmp'
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)
+
+    def _compact(self):
+        # Merge the single-version files once there are COMPACT_FILES of them,
+        # one row group per version
+        singles = [(first, path) for first, last, path in self.files() if first == last]
+        if len(singles) < COMPACT_FILES:
+            return
+        tmp = os.path.join(self.directory, f'{singles[0][0]}-{singles[-1][0]}.parquet.{os.getpid()}.tmp')
+        tables = [pq.read_table(path) for _, path in singles]
+        schema = pa.unify_schemas([table.schema for table in tables])
+        with pq.ParquetWriter(tmp, schema) as writer:
+            for table in tables:
+                writer.write_table(_conform(table, schema))
+        os.replace(tmp, tmp[:-len(f'.{os.getpid()}.tmp')])
+        for _, path in singles:
+            os.remove(path)
+
+    def read(self, columns, start=None, end=None, where=None):
+        # Rows of the log as of start through end (Timestamps, None for open
+        # ends): each key's last row at or before start (stamped start, keys
+        # removed by then left out), then every row logged after start, in time
+        # order. where ({column: value}) keeps only the rows with those values.
+        # Only TIME, the key, REMOVED, columns and the where columns are read,
+        # and only from the files overlapping the range.
+        where = where or {}
+        columns = list(dict.fromkeys([TIME, self.key, REMOVED] + list(columns) + list(where)))
+        start_ns = None if start is None else pd.Timestamp(start).value
+        end_ns = None if end is None else pd.Timestamp(end).value
+        for attempt in range(3):
+            files = self.files()
+            try:
+                base = self._scan([path for first, _, path in files if start_ns is not None and first <= start_ns],
+                                  columns, None, start_ns, where)
+                logged = self._scan([path for first, last, path in files
+                                     if (start_ns is None or last > start_ns) and (end_ns is None or first <= end_ns)],
+                                    columns, start_ns, end_ns, where)
+                break
+            except FileNotFoundError:
+                # Files merged while listed; list them again
+                if attempt == 2:
+                    raise
+        if start_ns is not None:
+            base = base.drop_duplicates(self.key, keep='last')
+            base = base[~base[REMOVED]].assign(**{TIME: pd.Timestamp(start_ns)})
+            logged = pd.concat([base, logged], ignore_index=True)
+        return logged
+
+    def _scan(self, paths, columns, after, until, where):
+        # Rows of paths with after < TIME <= until, in time order. Row groups
+        # outside the range are skipped by their TIME statistics, and files read
+        # directly (one small file costs less that way than through a dataset).
+        tables = []
+        for path in paths:
+            parquet = pq.ParquetFile(path)
+            groups = [i for i in range(parquet.num_row_groups)
+                      if _overlaps(parquet.metadata.row_group(i).column(0).statistics, after, until)]
+            if groups:
+                # Files written before a column appeared read it as nulls
+                names = parquet.schema_arrow.names
+                tables.append(parquet.read_row_groups(groups, [col for col in columns if col in names],
+                                                      use_threads=False))
+        if not tables:
+            return pd.DataFrame({col: [] for col in columns}).astype({TIME: 'datetime64[ns]', REMOVED: bool})
+        table = pa.concat_tables(tables, promote_options='default')
+        # Bounds as nanosecond scalars (a Timestamp would be cut to microseconds)
+        condition = None
+        for col, value in where.items():
+            condition = _and(condition, ds.field(col) == value)
+        if after is not None:
+            condition = _and(condition, ds.field(TIME) > pa.scalar(after, pa.timestamp('ns')))
+        if until is not None:
+            condition = _and(condition, ds.field(TIME) <= pa.scalar(until, pa.timestamp('ns')))
+        if condition is not None:
+            table = table.filter(condition)
+        frame = table.to_pandas().reindex(columns=columns)
+        return frame.sort_values(TIME, kind='stable', ignore_index=True)
+
+    def stats(self):
+        # Log files, their total bytes and the rows they hold
+        files = self.files()
+        return dict(files=len(files), bytes=sum(os.path.getsize(path) for _, _, path in files),
+                    rows=sum(pq.read_metadata(path).num_rows for _, _, path in files))
+
+
+def totals(rows, column, key):
+    # Sum of column over all keys after each version in rows (as read by
+    # History.read), removed keys counting 0: each logged row adds its change
+    # from the key's previous row
+    values = rows[column].where(~rows[REMOVED], 0).fillna(0)
+    previous = values.groupby(rows[key]).shift(fill_value=0)
+    return (values - previous).groupby(rows[TIME]).sum().cumsum()
+
+
+def changes(rows, column, key, start):
+    # Each key's value of column at start and after the last version in rows,
+    # and the change, for the keys that changed, largest change first
+    values = rows[column].where(~rows[REMOVED], 0).fillna(0)
+    frame = pd.DataFrame({
+        'Start': values[rows[TIME] == start].groupby(rows[key]).last(),
+        'End': values.groupby(rows[key]).last(),
+    }).fillna(0)
+    frame['Change'] = frame['End'] - frame['Start']
+    frame = frame[frame['Change'] != 0]
+    return frame.loc[frame['Change'].abs().sort_values(ascending=False, kind='stable').index]
+
+
+def series(rows, column, key, keys):
+    # column of each of keys after each version in rows, one column per key
+    # (missing before the key appeared and once it was removed)
+    picked = rows[rows[key].isin(keys)]
+    index = [picked[TIME], picked[key]]
+    values = picked[column].groupby(index).last().unstack().ffill()
+    removed = picked[REMOVED].astype(float).groupby(index).last().unstack().ffill()
+    return values.mask(removed == 1)
+
+
+def _overlaps(statistics, after, until):
+    # Whether a row group's TIME range (statistics of nanoseconds) may hold
+    # times after after and up to until
+    if statistics is None or not statistics.has_min_max:
+        return True
+    return (after is None or statistics.max_raw > after) and (until is None or statistics.min_raw <= until)
+
+
+def _and(condition, other):
+    return other if condition is None else condition & other
+
+
+def _conform(table, schema):
+    # table with schema's columns, missing ones as nulls
+    return pa.table([table.column(field.name).cast(field.type) if field.name in table.schema.names
+                     else pa.nulls(table.num_rows, field.type) for field in schema], schema=schema)
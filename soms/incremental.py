@@ -0,0 +1,102 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from soms.store import Dataset, extend_hash, fingerprint_hash, prepare_frame
+
+
+# Incremental refresh of append-only sheets. When a new snapshot only appends
+# rows to the one a dataset was built from (soms.snapshots records it as the
+# parent), only the new rows are typed and derived: they are appended to the
+# frame, hashed into its running fingerprint and folded into the sheet's running
+# aggregates, so a refresh costs in proportion to the new rows rather than the
+# whole history. The aggregates stand in for the derived tables of the whole
+# sheet (the rollup twins in soms.derived); filtered views still use the frame.
+
+# Append state of a dataset: the running fingerprint hash of its frame and the
+# sheet's rollup (None for sheets without one)
+LogState = namedtuple('LogState', ['digest', 'rollup'])
+
+
+def _sums(df, key, value):
+    # value summed per key, keyed by plain values rather than categories
+    sums = df.groupby(key, observed=True)[value].sum()
+    if isinstance(sums.index, pd.CategoricalIndex):
+        sums.index = sums.index.astype(object)
+    return sums
+
+
+def _add(total, part):
+    # Per-key sums of both, in key order; integer sums stay integers
+    if total is None:
+        return part.sort_index()
+    combined = total.add(part, fill_value=0).sort_index()
+    return combined.astype(np.result_type(total.dtype, part.dtype))
+
+
+class IdleRollup:
+    # Running aggregates of the idle manpower log: manhours per date and per
+    # client, cost per client, and the totals behind the metric cards. fold
+    # returns a new rollup, so one shared between sessions never changes.
+
+    def __init__(self, daily=None, client_manhours=None, client_cost=None, cost=0, cost_count=0, days_idle=0):
+        self.daily = daily
+        self.client_manhours = client_manhours
+        self.client_cost = client_cost
+        self.cost = cost
+        self.cost_count = cost_count
+        self.days_idle = days_idle
+
+    def fold(self, df):
+        return IdleRollup(
+            _add(self.daily, _sums(df, 'Date', 'Idle Manhours')),
+            _add(self.client_manhours, _sums(df, 'Client', 'Idle Manhours')),
+            _add(self.client_cost, _sums(df, 'Client', 'Pay Per Day')),
+            self.cost + df['Pay Per Day'].sum(),
+            self.cost_count + df['Pay Per Day'].count(),
+            self.days_idle + df['Days Idle'].sum(),
+        )
+
+
+ROLLUPS = {
+    'Idle Manpower': IdleRollup,
+}
+
+
+def track(dataset):
+    # The dataset with a log state, so later appends can be folded into it
+    rollup = ROLLUPS.get(dataset.name)
+    return dataset._replace(log=LogState(fingerprint_hash(dataset.frame),
+                                         rollup().fold(dataset.frame) if rollup else None))
+
+
+def _concat(frame, new):
+    # frame with the new rows appended; category columns get the sorted union of
+    # both categories, as the whole sheet typed at once would have. Categories
+    # are unified before the concat, which would otherwise turn columns with
+    # differing categories into objects across the whole history; the history's
+    # codes are only recoded when the new rows bring a category it lacks.
+    for col in frame.columns:
+        if isinstance(frame[col].dtype, pd.CategoricalDtype):
+            known = frame[col].cat.categories
+            added = new[col].cat.categories.difference(known)
+            union = known.append(added).sort_values() if len(added) else known
+            if len(added):
+                frame = frame.assign(**{col: frame[col].cat.set_categories(union)})
+            new = new.assign(**{col: new[col].cat.set_categories(union)})
+    return pd.concat([frame, new], ignore_index=True)
+
+
+def append_rows(dataset, raw):
+    # Tracked dataset extended with the raw rows appended to its sheet
+    if raw.empty:
+        return dataset
+    new, parse_errors = prepare_frame(dataset.name, raw)
+    frame = _concat(dataset.frame, new)
+    digest = extend_hash(dataset.log.digest, frame.iloc[len(dataset.frame):])
+    errors = dict(dataset.parse_errors)
+    for column, failures in parse_errors.items():
+        errors[column] = errors.get(column, 0) + failures
+    rollup = dataset.log.rollup.fold(new) if dataset.log.rollup is not None else None
+    return Dataset(dataset.name, frame, errors, digest.hexdigest(), log=LogState(digest, rollup))
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+
+class JobIndex:
+    # Timeline jobs in display order (by first start date, then job code) with
+    # sorted lookups, so picking the jobs in a date window, searching a job
+    # code or finding the active jobs is a binary search or a slice, and only
+    # the jobs in view are ever taken from the frame. Positions are indexes
+    # into the display order.
+
+    def __init__(self, jobs, today=None):
+        today = np.datetime64(today or pd.Timestamp.now().normalize(), 'ns')
+        codes = jobs['job_code'].astype(str).to_numpy(dtype=str)
+        dates = {col: jobs[col].to_numpy(dtype='datetime64[ns]')
+                 for col in ('Expected Start', 'Expected End', 'Actual Start', 'Actual End')}
+        first = np.fmin(dates['Expected Start'], dates['Actual Start'])
+        last = np.fmax(dates['Expected End'], dates['Actual End'])
+        self.jobs = jobs
+        self.order = np.lexsort((codes, first))
+        self.size = len(self.order)
+        self.first = first[self.order]
+        self.last = last[self.order]
+        # Latest end among the jobs up to each position: jobs before the first
+        # position reaching a date all ended before it
+        self.reach = np.maximum.accumulate(self.last) if self.size else self.last
+        lowered = np.char.lower(codes[self.order])
+        self.code_order = np.argsort(lowered, kind='stable')
+        self.codes = lowered[self.code_order]
+        # Started and not finished (open jobs end today once derived)
+        actual_start, actual_end = dates['Actual Start'][self.order], dates['Actual End'][self.order]
+        self.active = np.flatnonzero((actual_start <= today) & ~(actual_end < today))
+
+    def select(self, window=None):
+        # Positions of the jobs overlapping the date window (start, end), or a
+        # range over all jobs
+        if window is None:
+            return range(self.size)
+        start, end = (np.datetime64(pd.Timestamp(date), 'ns') for date in window)
+        lo = np.searchsorted(self.reach, start)
+        hi = np.searchsorted(self.first, end + np.timedelta64(1, 'D'))
+        return lo + np.flatnonzero(self.last[lo:hi] >= start) if hi > lo else np.array([], dtype=np.intp)
+
+    def find(self, text, positions=None):
+        # Position of the first job (in display order) whose code starts with
+        # text, ignoring case, among positions (sorted; all jobs by default);
+        # None without a match
+        text = text.lower()
+        lo = np.searchsorted(self.codes, text)
+        hi = np.searchsorted(self.codes, text + '\U0010ffff')
+        matches = self.code_order[lo:hi]
+        if positions is not None and not isinstance(positions, range):
+            matches = np.intersect1d(matches, positions)
+        return int(matches.min()) if len(matches) else None
+
+    def anchor(self, positions, find='', active=False):
+        # Index into positions where the view starts: the first job matching
+        # find, else the first active job if asked, else the top; None when
+        # neither matches
+        if find:
+            target = self.find(find, positions)
+        elif active:
+            candidates = self.active if isinstance(positions, range) else np.intersect1d(positions, self.active)
+            target = int(candidates[0]) if len(candidates) else None
+        else:
+            return 0
+        if target is None:
+            return None
+        if isinstance(positions, range):
+            return target
+        return int(np.searchsorted(positions, target))
+
+    def view(self, positions, start, rows=None):
+        # The jobs at positions[start:start + rows] in display order
+        selected = positions[start:] if rows is None else positions[start:start + rows]
+        return self.jobs.take(self.order[np.asarray(selected, dtype=np.intp)])
@@ -0,0 +1,38 @@
+from collections import namedtuple
+from collections.abc import Mapping
+
+from soms.startup import timed_import
+
+
+# What a dashboard page shows: a subheader, metric cards [(label, value)],
+# charts [(name, Spec)] in display order and captions under the subheader
+Page = namedtuple('Page', ['title', 'metrics', 'figures', 'notes'], defaults=[()])
+
+# Page function per sheet as (module, function), plus the history view of
+# Project Status (built from a soms.history.History rather than a dataset). Each
+# page is its own module, imported the first time the page is used, so a worker
+# only loads the pages (and the pandas and charting code behind them) its
+# sessions open.
+PAGE_MODULES = {
+    'Project Timeline': ('soms.pages.timeline', 'timeline_page'),
+    'Idle Manpower': ('soms.pages.idle', 'idle_page'),
+    'Project Status': ('soms.pages.status', 'status_page'),
+    'Project Status History': ('soms.pages.history', 'history_page'),
+}
+
+
+class LazyPages(Mapping):
+    # PAGES[sheet] is the sheet's page function, its module imported on demand
+
+    def __getitem__(self, sheet):
+        module, function = PAGE_MODULES[sheet]
+        return getattr(timed_import(module), function)
+
+    def __iter__(self):
+        return iter(PAGE_MODULES)
+
+    def __len__(self):
+        return len(PAGE_MODULES)
+
+
+PAGES = LazyPages()
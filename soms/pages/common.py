@@ -0,0 +1,56 @@
+from soms.derived import PIPELINE
+from soms.figcache import FIGURES, Spec
+
+
+# Helpers shared by the page modules
+
+# Thin border drawn around the idle manpower charts
+BORDER = dict(
+    type="rect",
+    x0=0, y0=0, x1=1, y1=1,
+    line=dict(color="#FFFFFC", width=0.5),
+    xref="paper", yref="paper"
+)
+
+
+def headline(text):
+    # Orange note centered above a chart
+    return dict(
+        xref="paper", yref="paper",
+        x=0.5, y=1.1,
+        text=text,
+        showarrow=False,
+        font=dict(size=14, color="orange"),
+        bordercolor="white",
+        borderwidth=0,
+        borderpad=4,
+    )
+
+
+def derived(name, dataset, perf):
+    # Memoized derived table for the page's dataset, timed as a transform span
+    with perf.span('transform', name) as span:
+        value = PIPELINE.compute(name, {dataset.name: dataset})
+        span['rows'] = len(value) if hasattr(value, 'shape') else None
+    return value
+
+
+def figure(name, dataset, perf, build, inputs, params=()):
+    # Serialized chart for the page's dataset. The figure cache is keyed by the
+    # dataset fingerprint and params (any chart option not in the data), so on a
+    # hit neither the inputs (a callable returning build's arguments) nor the
+    # figure are computed again
+    key = FIGURES.key(dataset.fingerprint, name, params)
+    spec = FIGURES.get(key)
+    if spec is not None:
+        perf.add('figure', name, cached=True, bytes=len(spec.json))
+        return spec
+    args = inputs()
+    with perf.span('figure', name) as span:
+        fig = build(*args)
+        span['rows'] = sum(len(trace['x'] if 'x' in trace else trace['values']) for trace in fig.data)
+    with perf.span('serialize', name) as span:
+        spec = Spec(fig.to_json(), fig.layout.height)
+        span['bytes'] = len(spec.json)
+    FIGURES.put(key, spec)
+    return spec
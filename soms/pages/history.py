@@ -0,0 +1,141 @@
+import pandas as pd
+import plotly.graph_objects as go
+
+from soms.history import TIME, changes, series, totals
+from soms.pages import Page
+from soms.pages.common import figure, headline
+from soms.perf import Recorder
+
+# Window shown when none is picked, ending at the last recorded version
+DEFAULT_DAYS = 90
+
+
+def _total_figure(total, column, end):
+    # Step line of the total after each version, held to the end of the window
+    total = pd.concat([total, pd.Series([total.iloc[-1]], index=[end])]) if end > total.index[-1] else total
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=total.index,
+        y=total.values,
+        mode='lines+markers',
+        line=dict(color='royalblue', width=2, shape='hv'),
+        name=column,
+    ))
+    fig.update_layout(
+        title=f'Total {column} per Version',
+        yaxis_title=column,
+        xaxis=dict(type='date', showgrid=True),
+        margin=dict(l=50, r=50, t=40, b=60),
+        annotations=[headline(f"Change: {total.iloc[-1] - total.iloc[0]:,.0f}")],
+        showlegend=False,
+        height=400,
+    )
+    return fig
+
+
+def _changes_figure(top_changes, column):
+    # Largest changes per job over the window, biggest on top
+    top_changes = top_changes.iloc[::-1]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=top_changes['Change'],
+        y=top_changes.index,
+        orientation='h',
+        marker_color=['green' if change > 0 else 'indianred' for change in top_changes['Change']],
+        text=[f'{change:,.0f}' for change in top_changes['Change']],
+        textposition='auto',
+        customdata=top_changes[['Start', 'End']].to_numpy(),
+        hovertemplate='%{y}<br>%{customdata[0]:,.0f} to %{customdata[1]:,.0f}<extra></extra>',
+    ))
+    fig.update_layout(
+        title=f'Largest Changes in {column}',
+        xaxis_title=f'Change in {column}',
+        margin=dict(l=50, r=50, t=40, b=60),
+        height=max(300, 30 * len(top_changes) + 120),
+    )
+    return fig
+
+
+def _jobs_figure(job_values, column, end, title):
+    # Step line per job, held to the end of the window
+    fig = go.Figure()
+    for job in job_values.columns:
+        values = job_values[job]
+        x, y = list(values.index), list(values.values)
+        if end > x[-1]:
+            x.append(end)
+            y.append(y[-1])
+        fig.add_trace(go.Scatter(x=x, y=y, mode='lines+markers', line=dict(shape='hv'), name=job))
+    fig.update_layout(
+        title=title,
+        yaxis_title=column,
+        xaxis=dict(type='date', showgrid=True),
+        margin=dict(l=50, r=50, t=40, b=60),
+        height=450,
+    )
+    return fig
+
+
+def history_page(history, perf=None, column='Balance', window=None, jobs=(), client=None, top=10):
+    # Trends and changes of a value column across the recorded versions of the
+    # sheet (a soms.history.History) within the window of dates (start, end),
+    # by default the last DEFAULT_DAYS days: the total over all jobs, the top
+    # jobs by change, and the value of the selected jobs (by default those top
+    # jobs) after each version. Only the key, time, column and the client filter
+    # column are read, and only for the window.
+    perf = perf or Recorder(history.sheet)
+    first, latest = history.first_time(), history.latest_time()
+    if latest is None:
+        return Page("Project Status History", [], [],
+                    ["No versions recorded yet; each new version of the sheet is logged as it refreshes."])
+    if window:
+        start, end = pd.Timestamp(window[0]), pd.Timestamp(window[1]) + pd.Timedelta(days=1) - pd.Timedelta(1)
+    else:
+        start, end = latest - pd.Timedelta(days=DEFAULT_DAYS), latest
+    # The state as of the window's start, no earlier than the first version
+    start, end = max(start, first), min(end, latest)
+    if end < start:
+        return Page("Project Status History", [], [], ["No versions recorded in the date window."])
+
+    with perf.span('read', 'history') as span:
+        rows = history.read([column], start, end, {'Client Name': client} if client else None)
+        span['rows'] = len(rows)
+    with perf.span('transform', 'history_changes') as span:
+        job_changes = changes(rows, column, history.key, start)
+        span['rows'] = len(job_changes)
+    # The state at start counts as one
+    versions = rows[TIME].nunique()
+    metrics = [
+        ("Versions", f"{versions:,}"),
+        ("Jobs Changed", f"{len(job_changes):,}"),
+        (f"Net Change in {column}", f"{job_changes['Change'].sum():,.0f}"),
+    ]
+    notes = [f"{start:%d %b %Y %H:%M} to {end:%d %b %Y %H:%M}" + (f", {client}" if client else "")]
+    if rows.empty:
+        return Page("Project Status History", metrics, [], notes + ["No jobs in this window."])
+
+    picked = list(jobs) or list(job_changes.index[:top])
+    title = f'{column} of {"Selected" if jobs else "Most Changed"} Jobs'
+    params = (column, start, end, client, top, tuple(picked))
+
+    def total_inputs():
+        with perf.span('transform', 'history_totals') as span:
+            total = totals(rows, column, history.key)
+            span['rows'] = len(total)
+        return [total, column, end]
+
+    def jobs_inputs():
+        with perf.span('transform', 'history_series') as span:
+            job_values = series(rows, column, history.key, picked)
+            span['rows'] = len(job_values)
+        return [job_values, column, end, title]
+
+    figures = [
+        ('history_total', figure('history_total', history, perf, _total_figure, total_inputs, params)),
+    ]
+    if len(job_changes):
+        figures.append(('history_changes', figure('history_changes', history, perf, _changes_figure,
+                                                  lambda: [job_changes.head(top), column], params)))
+    if picked and rows[history.key].isin(picked).any():
+        figures.append(('history_jobs', figure('history_jobs', history, perf, _jobs_figure, jobs_inputs, params)))
+    return Page("Project Status History", metrics, figures, notes)
@@ -0,0 +1,113 @@
+import plotly.graph_objects as go
+
+from soms.downsample import LABEL_BUDGET, idle_series
+from soms.pages import Page
+from soms.pages.common import BORDER, derived, figure, headline
+from soms.perf import Recorder
+
+
+def _idle_line_figure(df_idle_points, granularity, downsampled, average_idle_manhours):
+    # Text labels only when every point has room for one
+    show_labels = len(df_idle_points) <= LABEL_BUDGET
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=df_idle_points['Date'],
+        y=df_idle_points['Idle Manhours'],
+        mode='lines+markers+text' if show_labels else 'lines',
+        line=dict(color='royalblue', width=2),
+        name='Idle Manhours',
+        text=df_idle_points['Idle Manhours'] if show_labels else None,
+        textposition='top center',
+        textfont=dict(size=7)
+    ))
+
+    fig.update_layout(
+        title=f'Idle Manhours Per {granularity}' + (' (downsampled)' if downsampled else ''),
+        yaxis_title='Total Idle Manhours',
+        xaxis=dict(
+            type='date',
+            tickformat='%b %d, %Y',
+            showgrid=True,
+        ),
+        margin=dict(l=50, r=50, t=40, b=100),
+        shapes=[BORDER],
+        annotations=[headline(f"Avg Idle Hours per Day: {average_idle_manhours:,.0f}")],
+        showlegend=False,
+        height=400,
+    )
+    return fig
+
+
+def _client_idle_figure(df_client_idle):
+    total_idle_manhours = df_client_idle['Idle Manhours'].sum()
+    fig_client = go.Figure()
+    fig_client.add_trace(go.Bar(
+        x=df_client_idle['Client'],
+        y=df_client_idle['Idle Manhours'],
+        marker_color='indianred',
+        text=df_client_idle['Idle Manhours'],
+        textposition='auto',
+    ))
+
+    fig_client.update_layout(
+        title='Total Idle Manhours by Client',
+        yaxis_title='Total Idle Manhours',
+        margin=dict(l=50, r=50, t=40, b=100),
+        height=400,
+        shapes=[BORDER],
+        annotations=[headline(f"Total Idle Manhours: {total_idle_manhours:,.0f}")]
+    )
+    return fig_client
+
+
+def _client_cost_figure(df_client_cost):
+    # Waterfall of idle cost per client ending in the 'Total' row
+    fig_client_cost = go.Figure()
+    fig_client_cost.add_trace(go.Waterfall(
+        name='Cost of Idle Time',
+        measure=['relative'] * (len(df_client_cost) - 1) + ['total'],
+        x=df_client_cost['Client'],
+        y=df_client_cost['Pay Per Day'],
+        text=df_client_cost['Pay Per Day'],
+        textposition='auto',
+    ))
+
+    fig_client_cost.update_layout(
+        title='Total Cost of Idle Time by Client',
+        yaxis_title='Total Cost of Idle Time',
+        margin=dict(l=50, r=50, t=40, b=100),
+        height=600,
+        shapes=[BORDER],
+    )
+    return fig_client_cost
+
+
+def idle_page(dataset, perf=None, granularity='Auto'):
+    perf = perf or Recorder(dataset.name)
+    # Data for the cards (Idle Manhours is derived at load time)
+    df_daily_idle = derived('daily_idle', dataset, perf)
+    idle_metrics = derived('idle_metrics', dataset, perf)
+    average_idle_manhours = idle_metrics['average_idle_manhours']
+    metrics = [
+        ("Daily Avg Idle Manhours", f"{average_idle_manhours:,.0f}"),
+        ("Avg Cost of Idle Time", f"{idle_metrics['avg_cost_of_idle_time']:,.0f}"),
+        ("Total Idle Mandays", idle_metrics['total_idle_mandays']),
+    ]
+
+    def idle_points():
+        # Bucket the daily rollup (Auto picks the bucket size from the date
+        # range) and downsample it to the chart's point budget
+        with perf.span('transform', 'idle_series') as span:
+            df_idle_points, chosen, downsampled = idle_series(df_daily_idle, granularity)
+            span['rows'] = len(df_idle_points)
+        return [df_idle_points, chosen, downsampled, average_idle_manhours]
+
+    figures = [
+        ('daily_idle', figure('daily_idle', dataset, perf, _idle_line_figure, idle_points,
+                              params=(granularity,))),
+        ('client_idle', figure('client_idle', dataset, perf, _client_idle_figure,
+                               lambda: [derived('client_idle', dataset, perf)])),
+        ('client_cost', figure('client_cost', dataset, perf, _client_cost_figure,
+                               lambda: [derived('client_cost', dataset, perf)])),
+    ]
+    return Page("Idle Manpower Report", metrics, figures)
@@ -0,0 +1,115 @@
+import plotly.graph_objects as go
+
+from soms.pages import Page
+from soms.pages.common import derived, figure
+from soms.perf import Recorder
+
+
+def _remark_donut(remark_counts):
+    # Donut chart for total jobs by status (Remark)
+    fig_donut = go.Figure(data=[go.Pie(
+        labels=remark_counts.index,
+        values=remark_counts.values,
+        hole=0.4,
+        textinfo='label+percent',
+        marker=dict(colors=['gold', 'lightcoral', 'lightskyblue'])
+    )])
+    fig_donut.update_layout(title_text="Total Jobs by Status")
+    return fig_donut
+
+
+def _client_status_figure(client_status_filtered):
+    # Stacked bars of Completed and Ongoing jobs for clients with ongoing jobs
+    fig_client = go.Figure()
+    fig_client.add_trace(go.Bar(
+        x=client_status_filtered.index,
+        y=client_status_filtered['Completed'],
+        name='Completed Jobs',
+        marker_color='green',
+        text=client_status_filtered['Completed'],
+        textposition='inside',
+    ))
+    fig_client.add_trace(go.Bar(
+        x=client_status_filtered.index,
+        y=client_status_filtered['Ongoing'],
+        name='Ongoing Jobs',
+        marker_color='#FF7F7F',
+        text=client_status_filtered['Ongoing'],
+        textposition='inside',
+    ))
+
+    # Annotations for total values, set in one layout update
+    annotations = []
+    for client, total_value in client_status_filtered['Total Jobs'].items():
+        annotations.append(dict(
+            x=client,
+            y=total_value + 2,
+            text=f'{total_value}',
+            showarrow=False,
+            font=dict(size=12, color="orange")
+        ))
+
+    fig_client.update_layout(
+        title='Completed and Ongoing Jobs by Client',
+        yaxis_title='Number of Jobs',
+        barmode='stack',
+        xaxis=dict(tickangle=-45),  # Rotate x-axis labels for readability
+        height=400,
+        annotations=annotations
+    )
+    return fig_client
+
+
+def _type_status_figure(type_status):
+    # Stacked bars by Project Type, one trace per Remark
+    fig_type = go.Figure()
+    for status in type_status.columns:
+        fig_type.add_trace(go.Bar(
+            x=type_status.index,
+            y=type_status[status],
+            name=status,
+            text=type_status[status],  # Show values inside bars
+            textposition='auto'
+        ))
+
+    # Total number of jobs at the top of each stacked bar
+    totals = type_status.sum(axis=1)
+    annotations = []
+    for i, total in enumerate(totals):
+        annotations.append(dict(
+            x=type_status.index[i],
+            y=total,
+            text=str(total),
+            showarrow=False,
+            font=dict(size=12, color="orange"),
+            xanchor='center',
+            yanchor='bottom'
+        ))
+
+    fig_type.update_layout(
+        title='Completed and Ongoing Jobs by Project Type',
+        yaxis_title='Number of Jobs',
+        barmode='stack',
+        annotations=annotations
+    )
+    return fig_type
+
+
+def status_page(dataset, perf=None):
+    perf = perf or Recorder(dataset.name)
+    # Metrics based on the 'Remark' column
+    status_counts = derived('status_counts', dataset, perf)
+    metrics = [
+        ("Total Jobs", status_counts['total_jobs']),
+        ("Completed Jobs", status_counts['completed_jobs']),
+        ("Ongoing Jobs", status_counts['ongoing_jobs']),
+    ]
+    figures = [
+        ('remark_counts', figure('remark_counts', dataset, perf, _remark_donut,
+                                 lambda: [derived('remark_counts', dataset, perf)])),
+        ('client_status', figure('client_status', dataset, perf, _client_status_figure,
+                                 lambda: [derived('client_status', dataset, perf)])),
+        ('type_status', figure('type_status', dataset, perf, _type_status_figure,
+                               lambda: [derived('type_status', dataset, perf)])),
+    ]
+    return Page("Project Status Overview", metrics, figures)
@@ -0,0 +1,34 @@
+from soms.gantt import build_gantt
+from soms.pages import Page
+from soms.pages.common import derived, figure
+from soms.perf import Recorder
+
+
+def timeline_page(dataset, perf=None, rows=100, page=1, window=None, find='', active=False):
+    # Windowed Gantt chart: rows jobs per page (None for all of them) among the
+    # jobs overlapping the date window (start, end), counted from the first job
+    # matching find, or from the first active job; only those jobs are built
+    perf = perf or Recorder(dataset.name)
+    index = derived('timeline_index', dataset, perf)
+    with perf.span('transform', 'gantt_window') as span:
+        positions = index.select(window)
+        anchor = index.anchor(positions, find, active)
+        notes = []
+        if anchor is None:
+            notes.append((f"No job code starts with '{find}'" if find else "No active jobs")
+                         + (" in the date window." if window else "."))
+            anchor = 0
+        start = anchor + (page - 1) * (rows or 0)
+        if rows and start >= len(positions):
+            # Past the end: the last page
+            start = max(0, (len(positions) - 1) // rows * rows)
+        end = len(positions) if rows is None else min(start + rows, len(positions))
+        span['rows'] = end - start
+    notes.append(f"Jobs {start + 1:,}-{end:,} of {len(positions):,}" if end > start else "No jobs in the date window.")
+
+    def gantt_inputs():
+        x_range = list(window) if window else derived('timeline_range', dataset, perf)
+        return [index.view(positions, start, rows), x_range]
+
+    fig = figure('gantt', dataset, perf, build_gantt, gantt_inputs, params=(window, start, rows))
+    return Page("Timeline Chart", [], [('gantt', fig)], notes)
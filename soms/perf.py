@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+# Latest record per (page, stage, name) across all runs of the process, for the
+# Prometheus export
+_latest = {}
+_latest_lock = threading.Lock()
+
+# Name of the records of work done outside the script run (the refresher's
+# stages). Runs show them, but they are not part of the run's total, and each
+# is written to the JSON lines export once per refresh (its 'refresh' field):
+# the last one exported per (page, stage)
+BACKGROUND = 'background'
+_exported = {}
+
+
+class Recorder:
+    # Timing spans for one script run of one page. Each record has the page,
+    # stage (fetch, parse, transform, figure, serialize, render, or import and
+    # startup from soms.startup), an optional name (the derived table, chart or
+    # module), seconds, and when known rows, payload bytes and peak traced
+    # memory.
+
+    def __init__(self, page, trace_memory=False):
+        self.page = page
+        self.trace_memory = trace_memory
+        self.records = []
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _record(self, stage, name, seconds=0.0, **fields):
+        return dict(page=self.page, stage=stage, name=name, seconds=seconds, **fields)
+
+    def _append(self, record):
+        self.records.append(record)
+        with _latest_lock:
+            _latest[(self.page, record['stage'], record['name'])] = record
+
+    def add(self, stage, name=None, seconds=0.0, **fields):
+        record = self._record(stage, name, seconds, **fields)
+        self._append(record)
+        return record
+
+    @contextmanager
+    def span(self, stage, name=None):
+        # Time the block; the caller may fill in 'rows' or 'bytes' on the
+        # yielded record, also after the block ends
+        record = self._record(stage, name)
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            if self.trace_memory:
+                record['peak_bytes'] = tracemalloc.get_traced_memory()[1] - base
+            self._append(record)
+
+    def total(self):
+        # Time spent in this run (startup records count from process start, and
+        # background ones ran on other threads)
+        return sum(record['seconds'] for record in self.records
+                   if record['stage'] != 'startup' and record['name'] != BACKGROUND)
+
+    def export_jsonl(self, path):
+        with open(path, 'a') as f:
+            for record in self.records:
+                if record['name'] == BACKGROUND:
+                    with _latest_lock:
+                        if _exported.get((record['page'], record['stage'])) == record.get('refresh'):
+                            continue
+                        _exported[(record['page'], record['stage'])] = record.get('refresh')
+                f.write(json.dumps(dict(record, time=time.time())) + '\n')
+
+
+def _labels(page, stage, name):
+    labels = f'page="{page}",stage="{stage}"'
+    return labels + (f',name="{name}"' if name else '')
+
+
+def prometheus_text():
+    # Latest value of every stage in the Prometheus text exposition format
+    metrics = [
+        ('soms_stage_seconds', 'seconds', 'Duration of the last run of a dashboard stage'),
+        ('soms_stage_rows', 'rows', 'Rows handled by the last run of a dashboard stage'),
+        ('soms_stage_bytes', 'bytes', 'Payload size produced by the last run of a dashboard stage'),
+        ('soms_stage_peak_bytes', 'peak_bytes', 'Peak traced memory of the last run of a dashboard stage'),
+    ]
+    with _latest_lock:
+        records = list(_latest.values())
+    lines = []
+    for metric, field, help_text in metrics:
+        values = [(r, r[field]) for r in records if r.get(field) is not None]
+        if not values:
+            continue
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} gauge')
+        for record, value in values:
+            lines.append(f'{metric}{{{_labels(record["page"], record["stage"], record["name"])}}} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def export_prometheus(path):
+    # Rewrite the textfile atomically so a scraper never sees a partial file
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
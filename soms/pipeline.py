@@ -0,0 +1,90 @@
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+
+Node = namedtuple('Node', ['name', 'inputs', 'func'])
+# SQL implementation of a node, computed from the table of one root dataset
+Query = namedtuple('Query', ['name', 'root', 'func'])
+# Implementation of a node from the running aggregates of one root dataset
+Rollup = namedtuple('Rollup', ['name', 'root', 'func'])
+
+
+def _rollup(dataset):
+    return dataset.log.rollup if dataset.log is not None else None
+
+
+class Pipeline:
+    # Named derived tables with explicit inputs. An input is either another node
+    # or a root dataset (a soms.store.Dataset passed to compute). Each result is
+    # memoized on a fingerprint of its upstream data, so a node is only
+    # recomputed when something it depends on changed. Results are shared
+    # between sessions and must be treated as read-only. A node may also have a
+    # query, used instead when its root dataset is backed by a SQL table, and a
+    # rollup, used when its root dataset carries running aggregates
+    # (soms.incremental).
+
+    def __init__(self, max_entries=128):
+        self.nodes = {}
+        self.queries = {}
+        self.rollups = {}
+        self.max_entries = max_entries
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def node(self, name, inputs):
+        def register(func):
+            self.nodes[name] = Node(name, tuple(inputs), func)
+            return func
+        return register
+
+    def query(self, name, root):
+        def register(func):
+            self.queries[name] = Query(name, root, func)
+            return func
+        return register
+
+    def rollup(self, name, root):
+        def register(func):
+            self.rollups[name] = Rollup(name, root, func)
+            return func
+        return register
+
+    def fingerprint(self, name, roots):
+        if name in roots:
+            return roots[name].fingerprint
+        node = self.nodes[name]
+        upstream = '|'.join(self.fingerprint(inp, roots) for inp in node.inputs)
+        return hashlib.sha1(f'{name}:{upstream}'.encode('utf-8')).hexdigest()
+
+    def compute(self, name, roots):
+        # Value of node name given the root datasets {root name: Dataset}
+        if name in roots:
+            return roots[name].frame
+        key = self.fingerprint(name, roots)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return self._memo[key]
+        node = self.nodes[name]
+        query = self.queries.get(name)
+        rollup = self.rollups.get(name)
+        if query is not None and query.root in roots and roots[query.root].table is not None:
+            value = query.func(roots[query.root].table)
+        elif rollup is not None and rollup.root in roots and _rollup(roots[rollup.root]) is not None:
+            value = rollup.func(_rollup(roots[rollup.root]))
+        else:
+            value = node.func(*(self.compute(inp, roots) for inp in node.inputs))
+        with self._lock:
+            self.misses += 1
+            self._memo[key] = value
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._memo.clear()
@@ -0,0 +1,164 @@
+import argparse
+import datetime
+import html
+import json
+import os
+import sys
+import time
+
+from soms.artifacts import ARTIFACT_DIR, MANIFEST, read_manifest
+from soms.filters import FILTERS, build_index
+from soms.pages import PAGES
+from soms.snapshots import CACHE_DIR, ensure_snapshot, open_snapshot
+from soms.sources import SOURCES
+from soms.sqlstore import table_name
+from soms.store import build_dataset
+
+
+# Headless pre-rendering of the dashboard, e.g. from cron each morning:
+#
+#   python -m soms.prerender                       # every sheet into SOMS_ARTIFACT_DIR
+#   SOMS_IDLE_URL=file:///data/idle.csv python -m soms.prerender --sheets "Idle Manpower"
+#
+# Each source is revalidated once through the local snapshots (the last good
+# snapshot is used when the source cannot be reached, and file:// URLs work
+# offline), then the app's page functions run on the unfiltered sheet with the
+# default page options. Every page is written as a versioned artifact,
+# <sheet>-<fingerprint>.json with its metric cards, serialized charts and
+# sidebar filter options (plus a standalone .html), and manifest.json points
+# at the latest one per sheet. The app serves an artifact instead of building
+# the page while it was built from the snapshot version the app would show
+# (soms.artifacts).
+
+# Page options the artifacts are built with (the app's defaults)
+DEFAULT_OPTIONS = {
+    'Project Timeline': {'window': None, 'find': '', 'active': False, 'rows': 100, 'page': 1},
+    'Idle Manpower': {'granularity': 'Auto'},
+}
+
+# Versions kept per sheet besides the latest
+KEEP = 5
+
+PLOTLY_JS = 'https://cdn.plot.ly/plotly-{version}.min.js'
+
+
+def _plain(value):
+    # numpy scalars as the Python values JSON can hold
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _write_atomic(path, text):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _html(record):
+    # Standalone report of one page: the metric cards, then each chart drawn
+    # from its stored spec by plotly.js
+    from plotly.offline import get_plotlyjs_version
+
+    parts = [f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{html.escape(record["title"])}</title>',
+             f'<script src="{PLOTLY_JS.format(version=get_plotlyjs_version())}"></script></head><body>',
+             f'<h2>{html.escape(record["title"])}</h2>']
+    for note in record['notes']:
+        parts.append(f'<p><small>{html.escape(note)}</small></p>')
+    for label, value in record['metrics']:
+        parts.append(f'<div style="display:inline-block;margin-right:3em"><div>{html.escape(label)}</div>'
+                     f'<div style="font-size:2em">{html.escape(str(value))}</div></div>')
+    for i, figure in enumerate(record['figures']):
+        # '</' cannot occur in a script element; '<\/' is the same JSON
+        spec = figure['spec'].replace('</', '<\\/')
+        parts.append(f'<div id="chart-{i}"></div><script>(function(spec){{'
+                     f'Plotly.newPlot("chart-{i}", spec.data, spec.layout, {{responsive: true}});'
+                     f'}})({spec});</script>')
+    parts.append(f'<p><small>Built {html.escape(record["built_at"])} from snapshot '
+                 f'{record["version"][:12]}</small></p></body></html>')
+    return ''.join(parts)
+
+
+def _prune(artifact_dir, slug, keep):
+    # Drop all but the newest keep + 1 artifacts of a sheet
+    names = [name for name in os.listdir(artifact_dir) if name.startswith(slug + '-') and name.endswith('.json')]
+    names.sort(key=lambda name: os.path.getmtime(os.path.join(artifact_dir, name)), reverse=True)
+    for name in names[keep + 1:]:
+        for path in (name, name[:-len('.json')] + '.html'):
+            try:
+                os.remove(os.path.join(artifact_dir, path))
+            except FileNotFoundError:
+                pass
+
+
+def prerender(source, artifact_dir=None, cache_dir=None, html_report=True, keep=KEEP):
+    # Build and write the artifact of one source; returns its manifest entry
+    artifact_dir = artifact_dir or ARTIFACT_DIR
+    ensure_snapshot(source.url, cache_dir, ttl=0)
+    table, meta = open_snapshot(source.url, cache_dir)
+    dataset = build_dataset(source.name, table.to_pandas())
+    index = build_index(dataset)
+    options = DEFAULT_OPTIONS.get(source.name, {})
+    page = PAGES[source.name](dataset, **options)
+
+    slug = f'{table_name(source.name)}-{dataset.fingerprint[:16]}'
+    record = {
+        'sheet': source.name,
+        'version': meta['sha256'],
+        'date': datetime.date.today().isoformat(),
+        'fingerprint': dataset.fingerprint,
+        'built_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'rows': len(dataset.frame),
+        'parse_errors': {col: _plain(count) for col, count in dataset.parse_errors.items()},
+        'options': options,
+        'filters': {
+            'years': [_plain(year) for year in index.years()],
+            'months': index.months(),
+            'values': {label: [_plain(value) for value in index.values(label)]
+                       for label in FILTERS[source.name][1]},
+        },
+        'title': page.title,
+        'metrics': [[label, _plain(value)] for label, value in page.metrics],
+        'figures': [{'name': name, 'height': spec.height, 'spec': spec.json} for name, spec in page.figures],
+        'notes': list(page.notes),
+    }
+    _write_atomic(os.path.join(artifact_dir, slug + '.json'), json.dumps(record))
+    if html_report:
+        _write_atomic(os.path.join(artifact_dir, slug + '.html'), _html(record))
+    _prune(artifact_dir, table_name(source.name), keep)
+    entry = {key: record[key] for key in ('version', 'date', 'fingerprint', 'built_at', 'rows')}
+    entry['path'] = slug + '.json'
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prerender the SOMS dashboard pages')
+    parser.add_argument('--sheets', nargs='+', choices=[source.name for source in SOURCES],
+                        default=[source.name for source in SOURCES])
+    parser.add_argument('--output', default=ARTIFACT_DIR, help='artifact directory (SOMS_ARTIFACT_DIR)')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='snapshot directory (SOMS_CACHE_DIR)')
+    parser.add_argument('--no-html', action='store_true', help='write the JSON artifacts only')
+    parser.add_argument('--keep', type=int, default=KEEP, help='older versions kept per sheet')
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    manifest = read_manifest(args.output)
+    failed = False
+    for source in SOURCES:
+        if source.name not in args.sheets:
+            continue
+        start = time.perf_counter()
+        try:
+            entry = prerender(source, args.output, args.cache_dir, not args.no_html, args.keep)
+        except Exception as exc:
+            # Other sheets are still published; the manifest keeps this one's last artifact
+            print(f'{source.name}: failed: {exc}', file=sys.stderr)
+            failed = True
+            continue
+        manifest[source.name] = entry
+        print(f"{source.name}: {entry['rows']:,} rows -> {entry['path']} ({time.perf_counter() - start:.1f}s)")
+    _write_atomic(os.path.join(args.output, MANIFEST), json.dumps(manifest, indent=1))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,192 @@
+import datetime
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from soms.snapshots import ensure_snapshot, read_meta
+
+logger = logging.getLogger(__name__)
+
+# Share of a refresh period within which another worker's fetch of the source
+# stands in for this one's. Well under the period, so the snapshot this worker
+# fetched one timer tick ago counts as stale when the timer next fires.
+TTL_SHARE = 0.5
+
+
+class Refresher:
+    # Loads every source concurrently in the background and keeps the built
+    # datasets fresh, so page reruns only read from memory. Each source is
+    # revalidated after lead * interval seconds, ahead of its TTL expiring;
+    # workers sharing the snapshot cache fetch it at most once per
+    # TTL_SHARE of that period.
+    # With a store (soms.sqlstore.SqlStore) new versions are loaded into it
+    # instead, and datasets only refer to its tables. pandas and the dataset
+    # modules are first imported by the loading threads, so starting a
+    # refresher does not hold up the app's first page.
+
+    def __init__(self, sources, max_workers=3, lead=0.8, store=None):
+        self.sources = {source.name: source for source in sources}
+        self.lead = lead
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='soms-refresh')
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pending = {}
+        self._datasets = {}
+        self._versions = {}
+        self._errors = {}
+        self.timings = {}
+
+    def start(self, first=None):
+        # With first, that source loads alone and the others once it is done,
+        # so the page a new worker is asked for is not slowed by the rest
+        if first is not None:
+            self._submit(first).add_done_callback(lambda _: self._submit_all())
+        else:
+            self._submit_all()
+        threading.Thread(target=self._run, name='soms-refresher', daemon=True).start()
+        return self
+
+    def _submit_all(self):
+        for name in self.sources:
+            self._submit(name)
+
+    def stop(self):
+        self._stop.set()
+        self._pool.shutdown(wait=False)
+
+    def _run(self):
+        due = {name: time.time() + self._period(name) for name in self.sources}
+        while not self._stop.is_set():
+            now = time.time()
+            for name, at in due.items():
+                if at <= now:
+                    self._submit(name)
+                    due[name] = now + self._period(name)
+            self._stop.wait(max(0.0, min(due.values()) - time.time()))
+
+    def _period(self, name):
+        return self.sources[name].interval * self.lead
+
+    def _ttl(self, name):
+        return self._period(name) * TTL_SHARE
+
+    def _submit(self, name):
+        # At most one refresh in flight per source
+        with self._lock:
+            future = self._pending.get(name)
+            if future is None or future.done():
+                future = self._pending[name] = self._pool.submit(self._refresh, name)
+            return future
+
+    def _refresh(self, name):
+        from soms.history import History
+        from soms.incremental import append_rows, track
+        from soms.snapshots import open_snapshot
+        from soms.store import build_dataset, row_count
+
+        source = self.sources[name]
+        timings = dict(self.timings.get(name, {}))
+        try:
+            start = time.perf_counter()
+            ensure_snapshot(source.url, ttl=self._ttl(name))
+            timings['fetch'] = time.perf_counter() - start
+            # The version comes with the table, not <key>.json: another process
+            # may replace the snapshot between reading one and the other
+            table, meta = open_snapshot(source.url)
+            # Which refresh the fetch timing is from; the load timings are from
+            # building timings['version']
+            timings['fetched_at'] = time.time()
+            # Rebuild only when the content changed, or the day rolled over
+            # (open timeline jobs are clipped to today)
+            version = (meta.get('sha256'), datetime.date.today())
+            if self._versions.get(name) != version:
+                # Rows were only appended to the snapshot version the dataset holds
+                parent = meta.get('parent') if source.append_only else None
+                current = self._datasets.get(name)
+                incremental = (parent is not None and self._versions.get(name) == (parent, version[1])
+                               and current.log is not None and row_count(current) == meta['parent_rows'])
+                if self.store is not None:
+                    # Chunked read and parse into the store
+                    start = time.perf_counter()
+                    dataset = self.store.load(name, table, f'{version[0]}:{version[1]}',
+                                              parent and (f'{parent}:{version[1]}', meta['parent_rows']))
+                    timings['parse'] = time.perf_counter() - start
+                    timings.pop('read', None)
+                elif incremental:
+                    # Only the new rows are read, parsed and folded in
+                    start = time.perf_counter()
+                    raw = table.slice(meta['parent_rows']).to_pandas()
+                    timings['read'] = time.perf_counter() - start
+                    start = time.perf_counter()
+                    dataset = append_rows(current, raw)
+                    timings['parse'] = time.perf_counter() - start
+                else:
+                    start = time.perf_counter()
+                    raw = table.to_pandas()
+                    timings['read'] = time.perf_counter() - start
+                    start = time.perf_counter()
+                    dataset = build_dataset(name, raw)
+                    if source.append_only:
+                        dataset = track(dataset)
+                    timings['parse'] = time.perf_counter() - start
+                timings['rows'] = row_count(dataset)
+                timings['version'] = f'{version[0]}:{version[1]}'
+                # Rows the snapshot added to its parent
+                if parent is not None:
+                    timings['appended'] = timings['rows'] - meta['parent_rows']
+                else:
+                    timings.pop('appended', None)
+                with self._lock:
+                    self._datasets[name] = dataset
+                    self._versions[name] = version
+                if source.history:
+                    # Rows that changed since the last logged version, once
+                    # across processes
+                    start = time.perf_counter()
+                    try:
+                        History(name).record(dataset, version[0], meta.get('modified_at'))
+                    except Exception as exc:
+                        logger.warning('Logging %s history failed: %s', name, exc)
+                    timings['history'] = time.perf_counter() - start
+            self.timings[name] = timings
+            self._errors.pop(name, None)
+        except Exception as exc:
+            logger.warning('Refreshing %s failed: %s', name, exc)
+            self._errors[name] = exc
+
+    def dataset(self, name):
+        # Latest dataset for a source; only blocks while its first load runs
+        dataset = self._datasets.get(name)
+        if dataset is None:
+            self._submit(name).result()
+            dataset = self._datasets.get(name)
+            if dataset is None:
+                raise self._errors[name]
+        return dataset
+
+    def version(self, name):
+        # (snapshot sha256, date) of the loaded dataset, None before its first
+        # load; never blocks
+        return self._versions.get(name)
+
+    def status(self):
+        # {name: (seconds since the source was last confirmed current, error)}
+        now = time.time()
+        status = {}
+        for name, source in self.sources.items():
+            meta = read_meta(source.url)
+            age = now - meta['checked_at'] if meta else None
+            status[name] = (age, self._errors.get(name))
+        return status
+
+
+def format_age(seconds):
+    if seconds is None:
+        return 'not loaded'
+    if seconds < 60:
+        return f'{seconds:.0f}s ago'
+    if seconds < 3600:
+        return f'{seconds / 60:.0f}m ago'
+    return f'{seconds / 3600:.1f}h ago'
@@ -0,0 +1,123 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+
+# One declared column of a sheet: kind is 'money', 'number', 'date',
+# 'category' or 'text'; fmt is the strptime format for dates
+Column = namedtuple('Column', ['name', 'kind', 'fmt'], defaults=[None])
+
+MONEY_COLUMNS = ['PO Amount', 'Profit Margin', 'Estimated Budget',
+                 'Allocated Budget to Project Team', 'Expense by Project Team',
+                 'Balance', 'Profit Trend']
+
+SCHEMAS = {
+    'Project Timeline': [
+        Column('job_code', 'text'),
+        Column('Expected Start', 'date', '%d-%b-%Y'),
+        Column('Expected End', 'date', '%d-%b-%Y'),
+        Column('Actual Start', 'date', '%d-%b-%Y'),
+        Column('Actual End', 'date'),
+    ],
+    'Idle Manpower': [
+        Column('Date', 'date'),
+        Column('Client', 'category'),
+        Column('Site', 'category'),
+        Column('Days Idle', 'number'),
+        Column('Pay Per Day', 'number'),
+    ],
+    'Project Status': [
+        Column('Job Code', 'text'),
+        Column('Client Name', 'category'),
+        Column('PO received date', 'text'),
+        Column('Project Type', 'category'),
+        Column('Remark', 'category'),
+    ] + [Column(name, 'money') for name in MONEY_COLUMNS],
+}
+
+# Spreadsheet error values and accounting blanks that mean "no value"
+NULL_TOKENS = {'', '-', '#VALUE!', '#N/A', '#DIV/0!', '#REF!', '#NAME?', '#NUM!'}
+
+# The whole cell: a number with optional currency text ('OMR', 'R.O.') and a
+# sign marker ('-' or an opening accounting parenthesis) before it, either side
+# of the currency, and only an optional closing parenthesis after it. Anything
+# else ('12-Mar', '1.5-2') does not match and counts as a failed cell.
+MONEY_PATTERN = (r'^\s*(?P<lead>[-(])?\s*(?:[A-Za-z.]+\s*)?(?P<sign>[-(])?\s*'
+                 r'(?P<num>\d[\d,]*(?:\.\d+)?)\s*\)?\s*$')
+
+
+def _is_null(raw):
+    return raw.isna() | raw.str.strip().isin(NULL_TOKENS)
+
+
+def _money_values(raw):
+    # Parse 'OMR 1,234.50', 'OMR (1,234)', '-1,234' style cells in one regex pass;
+    # parentheses and leading minus signs are negatives
+    parts = raw.str.extract(MONEY_PATTERN)
+    values = pd.to_numeric(parts['num'].str.replace(',', '', regex=False), errors='coerce')
+    values = values.to_numpy(dtype=float, na_value=np.nan)
+    negative = parts['lead'].notna().to_numpy() | parts['sign'].notna().to_numpy()
+    return np.where(negative, -values, values)
+
+
+def _number_values(raw):
+    values = pd.to_numeric(raw.str.replace(',', '', regex=False), errors='coerce')
+    return values.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _per_unique(col, parse):
+    # Sheet columns repeat the same cells (dates, amounts) many times, so each
+    # distinct cell is parsed once and the results are spread back by code.
+    # Returns the parsed values and the number of cells that failed to parse.
+    codes, uniques = pd.factorize(col)
+    raw = pd.Series(uniques, dtype='string')
+    values = np.asarray(parse(raw))
+    failed = pd.isna(values) & ~_is_null(raw).to_numpy(dtype=bool)
+    counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+    # code -1 (missing cell) picks the appended missing value
+    missing = np.array([None], dtype=values.dtype) if values.dtype.kind == 'M' else np.array([np.nan])
+    return pd.Series(np.concatenate([values, missing])[codes], index=col.index, name=col.name), int(counts[failed].sum())
+
+
+def parse_money(col):
+    if is_numeric_dtype(col):
+        return col.astype(float), 0
+    return _per_unique(col, _money_values)
+
+
+def parse_number(col):
+    if is_numeric_dtype(col):
+        return col, 0
+    return _per_unique(col, _number_values)
+
+
+def parse_date(col, fmt=None):
+    return _per_unique(col, lambda raw: pd.to_datetime(raw, format=fmt, errors='coerce').to_numpy(dtype='datetime64[ns]'))
+
+
+def parse_column(col, column):
+    if column.kind == 'money':
+        return parse_money(col)
+    if column.kind == 'number':
+        return parse_number(col)
+    if column.kind == 'date':
+        return parse_date(col, column.fmt)
+    if column.kind == 'category':
+        return col.astype('category'), 0
+    return col, 0
+
+
+def apply_schema(df, schema):
+    # Type every declared column present in the frame in a single pass per column.
+    # Returns the typed frame and {column: number of cells that failed to parse}.
+    typed = {}
+    report = {}
+    for column in schema:
+        if column.name not in df.columns:
+            continue
+        typed[column.name], failures = parse_column(df[column.name], column)
+        if failures:
+            report[column.name] = failures
+    return df.assign(**typed), report
@@ -0,0 +1,298 @@
+import hashlib
+import http.client
+import io
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # no cross-process locking on Windows, each process refreshes
+    fcntl = None
+
+
+# Local snapshot of each published sheet: <key>.feather holds the parsed frame
+# (uncompressed Arrow IPC, so it can be memory-mapped), <key>.json the fetch
+# metadata used to revalidate it and <key>.lock elects the refreshing process.
+# The two files are replaced one after the other, so the version of the data
+# (VERSION_FIELDS of the metadata) is also written into the feather schema and
+# readers label what they read from that, never from <key>.json.
+# The directory is shared by every worker on the machine. pandas and pyarrow
+# are imported by the functions that read or write snapshots, so checking
+# snapshot metadata stays cheap at startup.
+CACHE_DIR = os.environ.get('SOMS_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), '.cache'))
+FETCH_TIMEOUT = 30
+# A source is revalidated at most once per TTL window across all processes
+SNAPSHOT_TTL = int(os.environ.get('SOMS_SNAPSHOT_TTL', 60))
+VERSION_KEY = b'soms'
+VERSION_FIELDS = ('sha256', 'rows', 'parent', 'parent_rows', 'modified_at')
+
+
+def snapshot_key(url):
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+
+def _paths(url, cache_dir):
+    key = snapshot_key(url)
+    return os.path.join(cache_dir, key + '.feather'), os.path.join(cache_dir, key + '.json')
+
+
+@contextmanager
+def _source_lock(url, cache_dir, blocking):
+    # Exclusive per-source file lock; yields False if it is held elsewhere and
+    # blocking is off
+    lock_path = os.path.join(cache_dir, snapshot_key(url) + '.lock')
+    with open(lock_path, 'a') as f:
+        if fcntl is None:
+            yield True
+            return
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def read_meta(url, cache_dir=None):
+    _, meta_path = _paths(url, cache_dir or CACHE_DIR)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_atomic(path, write):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _write_meta(meta_path, meta):
+    def write(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+    _write_atomic(meta_path, write)
+
+
+def open_snapshot(url, cache_dir=None):
+    # (table, version) of the local snapshot: the memory-mapped table and the
+    # VERSION_FIELDS it was written with. Snapshots written before the version
+    # was kept in the file fall back to <key>.json.
+    import pyarrow.feather as feather
+
+    data_path, _ = _paths(url, cache_dir or CACHE_DIR)
+    table = feather.read_table(data_path, memory_map=True)
+    metadata = table.schema.metadata or {}
+    if VERSION_KEY in metadata:
+        return table, json.loads(metadata[VERSION_KEY])
+    meta = read_meta(url, cache_dir) or {}
+    return table, {field: meta.get(field) for field in VERSION_FIELDS}
+
+
+def read_snapshot(url, cache_dir=None, start=0):
+    # The snapshot from row start on (an appended tail is read without touching
+    # the rows before it)
+    table, _ = open_snapshot(url, cache_dir)
+    return table.slice(start).to_pandas()
+
+
+def iter_chunks(table, chunk_rows=100_000, start=0):
+    # A snapshot table from row start on as frames of at most chunk_rows rows
+    # (at least one, possibly empty); slices of the memory-mapped table are only
+    # copied into pandas one chunk at a time
+    table = table.slice(start)
+    for offset in range(0, max(table.num_rows, 1), chunk_rows):
+        yield table.slice(offset, chunk_rows).to_pandas()
+
+
+def _write_feather(data, version):
+    # data is a frame or an Arrow table; version the VERSION_FIELDS it is
+    # labelled with
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    table = data if isinstance(data, pa.Table) else pa.Table.from_pandas(data)
+    metadata = dict(table.schema.metadata or {})
+    metadata[VERSION_KEY] = json.dumps({field: version.get(field) for field in VERSION_FIELDS}).encode('utf-8')
+    table = table.replace_schema_metadata(metadata)
+
+    def write(tmp):
+        feather.write_feather(table, tmp, compression='uncompressed')
+    return write
+
+
+def _csv_dtype(field_type):
+    # read_csv dtype that parses new cells of a snapshot column the way the
+    # whole file parsed them, or None for column types this cannot guarantee
+    import pyarrow as pa
+
+    if pa.types.is_integer(field_type):
+        return 'int64'
+    if pa.types.is_floating(field_type):
+        return 'float64'
+    if pa.types.is_boolean(field_type):
+        return 'bool'
+    if pa.types.is_string(field_type) or pa.types.is_large_string(field_type):
+        return 'str'
+    return None
+
+
+def _appended_table(body, meta, data_path):
+    # When body only appends rows to the content of the current snapshot (its
+    # bytes are an unchanged prefix ending at a line break), the new snapshot
+    # table with only the new rows parsed, as the columns of the current
+    # snapshot. None when the whole body has to be parsed: earlier rows changed,
+    # or a new cell does not fit its column's type (the full parse would type
+    # that column differently).
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    size = meta.get('bytes') if meta else None
+    if not size or len(body) < size or hashlib.sha256(body[:size]).hexdigest() != meta.get('sha256'):
+        return None
+    if body[size - 1:size] not in (b'\n', b'\r') and body[size:size + 1] not in (b'\n', b'\r'):
+        # The last row was edited, not followed by new ones
+        return None
+    current = feather.read_table(data_path, memory_map=True)
+    dtypes = {field.name: _csv_dtype(field.type) for field in current.schema}
+    if None in dtypes.values():
+        return None
+    tail = body[size:].lstrip(b'\r\n')
+    if not tail.strip():
+        return current
+    try:
+        new = pd.read_csv(io.BytesIO(tail), header=None, names=current.column_names, dtype=dtypes, index_col=False)
+        new = pa.Table.from_pandas(new, preserve_index=False).cast(current.schema)
+    except (ValueError, TypeError):
+        return None
+    return pa.concat_tables([current, new])
+
+
+def is_fresh(meta, ttl=None):
+    # True while the last refresh attempt is inside the TTL window
+    ttl = SNAPSHOT_TTL if ttl is None else ttl
+    attempted = meta and meta.get('attempted_at', meta.get('checked_at'))
+    return bool(attempted) and time.time() - attempted < ttl
+
+
+def has_snapshot(url, cache_dir=None):
+    data_path, meta_path = _paths(url, cache_dir or CACHE_DIR)
+    return os.path.exists(data_path) and os.path.exists(meta_path)
+
+
+def _request(url, meta):
+    headers = {}
+    if meta:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+    return urllib.request.Request(url, headers=headers)
+
+
+def refresh_snapshot(url, cache_dir=None, timeout=FETCH_TIMEOUT):
+    # Revalidate the local snapshot against the source and rewrite it only if the
+    # content changed. Returns True when a new snapshot was written.
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    data_path, meta_path = _paths(url, cache_dir)
+    meta = read_meta(url, cache_dir) if os.path.exists(data_path) else None
+    now = time.time()
+
+    try:
+        with urllib.request.urlopen(_request(url, meta), timeout=timeout) as resp:
+            body = resp.read()
+            etag = resp.headers.get('ETag')
+            last_modified = resp.headers.get('Last-Modified')
+    except urllib.error.HTTPError as exc:
+        if exc.code != 304 or meta is None:
+            _mark_attempt(meta_path, meta, now)
+            raise
+        # Not modified, the local snapshot is still current
+        meta.update(checked_at=now, attempted_at=now)
+        _write_meta(meta_path, meta)
+        return False
+    except (OSError, http.client.HTTPException):
+        # Unreachable, or a broken response such as a truncated body
+        _mark_attempt(meta_path, meta, now)
+        raise
+
+    digest = hashlib.sha256(body).hexdigest()
+    if meta is not None and meta.get('sha256') == digest:
+        # Server does not support validators but the content is unchanged
+        meta.update(checked_at=now, attempted_at=now, etag=etag, last_modified=last_modified)
+        _write_meta(meta_path, meta)
+        return False
+
+    new_meta = {
+        'url': url,
+        'etag': etag,
+        'last_modified': last_modified,
+        'sha256': digest,
+        'bytes': len(body),
+        'checked_at': now,
+        'attempted_at': now,
+        'modified_at': now,
+    }
+    table = _appended_table(body, meta, data_path)
+    if table is not None:
+        # Rows were only appended: readers holding the previous version (parent)
+        # can take just the rows from parent_rows on
+        new_meta.update(rows=table.num_rows, parent=meta['sha256'], parent_rows=meta['rows'])
+        _write_atomic(data_path, _write_feather(table, new_meta))
+    else:
+        import pandas as pd
+
+        df = pd.read_csv(io.BytesIO(body))
+        new_meta['rows'] = len(df)
+        _write_atomic(data_path, _write_feather(df, new_meta))
+    _write_meta(meta_path, new_meta)
+    return True
+
+
+def _mark_attempt(meta_path, meta, now):
+    # Record a failed refresh so other processes keep serving the old snapshot
+    # for the rest of the TTL window instead of retrying at once
+    if meta is not None:
+        meta['attempted_at'] = now
+        _write_meta(meta_path, meta)
+
+
+def ensure_snapshot(url, cache_dir=None, timeout=FETCH_TIMEOUT, ttl=None):
+    # Make sure the local snapshot has been revalidated within the TTL window,
+    # at most once across all processes sharing cache_dir (single flight): the
+    # process that wins the source lock refreshes, the others keep the current
+    # snapshot. Returns the snapshot metadata.
+    cache_dir = cache_dir or CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    meta = read_meta(url, cache_dir)
+    if has_snapshot(url, cache_dir) and is_fresh(meta, ttl):
+        return meta
+
+    # Without a snapshot there is nothing to serve, so wait for the leader
+    blocking = not has_snapshot(url, cache_dir)
+    with _source_lock(url, cache_dir, blocking) as leader:
+        # Re-check under the lock: another process may have just refreshed
+        if leader and not (has_snapshot(url, cache_dir) and is_fresh(read_meta(url, cache_dir), ttl)):
+            try:
+                refresh_snapshot(url, cache_dir, timeout)
+            except (OSError, ValueError, http.client.HTTPException):
+                if not has_snapshot(url, cache_dir):
+                    raise
+    return read_meta(url, cache_dir)
+
+
+def load_snapshot(url, cache_dir=None, timeout=FETCH_TIMEOUT, ttl=None):
+    # Return the sheet as a DataFrame; when the source cannot be reached the last
+    # good snapshot is served instead
+    ensure_snapshot(url, cache_dir, timeout, ttl)
+    return read_snapshot(url, cache_dir)
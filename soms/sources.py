@@ -0,0 +1,24 @@
+import os
+from collections import namedtuple
+
+
+# A configured data source: sheet name, CSV URL and refresh interval in seconds.
+# Append-only sources (logs) are refreshed incrementally when new snapshots only
+# add rows (soms.incremental). Each new version of a source with history is
+# logged to its soms.history.History.
+Source = namedtuple('Source', ['name', 'url', 'interval', 'append_only', 'history'], defaults=[False, False])
+
+# Google Sheets URLs (override with SOMS_*_URL, e.g. to point at local fixtures)
+project_sheet_url = os.environ.get('SOMS_TIMELINE_URL', 'https://docs.google.com/spreadsheets/d/e/2PACX-1vSi8SH1hivNxPLDZaVQBDqMQLFcwGLVkSNzQmmsXCvZbA8cHBvsC9sPkVF9NjKKkXm93lV13cAA0wrT/pub?output=csv')
+idle_time_url = os.environ.get('SOMS_IDLE_URL', 'https://docs.google.com/spreadsheets/d/e/2PACX-1vSim4lC_gDM7-CE35oHbF5kRMpAiLv8YRXDAZC4SYHSRq6XfS62pngKd0efrAkIvTEBlv728_JC-G5t/pub?output=csv')
+Project_status = os.environ.get('SOMS_STATUS_URL', 'https://docs.google.com/spreadsheets/d/e/2PACX-1vRNe0IR8SyrCU7H6J4gRXswVJVKukw0VFivj61AYCvJH96BovUJByWNKP95-kSiEV-rR1wc-F9NMYUF/pub?output=csv')
+
+# Refresh interval per sheet in seconds; the idle log only ever gains rows, so
+# new snapshots of it are folded in incrementally, and project status changes
+# are kept for the history view
+SOURCES = [
+    Source("Project Timeline", project_sheet_url, int(os.environ.get('SOMS_TIMELINE_INTERVAL', 60))),
+    Source("Idle Manpower", idle_time_url, int(os.environ.get('SOMS_IDLE_INTERVAL', 60)), append_only=True),
+    Source("Project Status", Project_status, int(os.environ.get('SOMS_STATUS_INTERVAL', 60)), history=True),
+]
+SOURCES_BY_NAME = {source.name: source for source in SOURCES}
@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+import pandas as pd
+
+from soms.schema import SCHEMAS
+from soms.snapshots import CACHE_DIR, fcntl, iter_chunks
+from soms.store import Dataset, prepare_frame
+
+
+# Optional query backend: each refreshed sheet is loaded into one table of a
+# local SQLite file, and filters and aggregates run there as indexed queries
+# that return only the small tables the charts need. Processes keep no copy of
+# the sheets in memory, and ingestion reads the snapshot in chunks, so memory
+# stays flat as the sheets grow. The file is shared by every worker on the
+# machine; dates are stored as integer nanoseconds.
+
+# Indexed column sets per sheet, matching the filters and group-bys; the idle
+# log's indexes also cover the summed columns, so its aggregates never read the
+# table itself
+IDLE_VALUES = ['Idle Manhours', 'Pay Per Day', 'Days Idle']
+INDEXES = {
+    'Project Timeline': [['Expected Start']],
+    'Idle Manpower': [['Date'] + IDLE_VALUES, ['Client', 'Date'] + IDLE_VALUES, ['Site', 'Date'] + IDLE_VALUES],
+    'Project Status': [['Remark'], ['Client Name', 'Remark'], ['Project Type', 'Remark']],
+}
+
+CHUNK_ROWS = 100_000
+
+# Insertion order of the sheet rows, kept as the rowid
+ROW = '_row'
+
+
+def table_name(sheet):
+    return sheet.lower().replace(' ', '_')
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _values(frame):
+    # Column values as Python objects sqlite3 can bind, missing cells as None
+    columns = []
+    for col in frame.columns:
+        values = frame[col]
+        if values.dtype.kind == 'M':
+            objects = values.to_numpy(dtype='datetime64[ns]').view('int64').astype(object)
+        else:
+            objects = values.to_numpy(dtype=object)
+        objects[values.isna().to_numpy()] = None
+        columns.append(objects)
+    return zip(*columns)
+
+
+class Table:
+    # The rows of one sheet's table matching all clauses (SQL conditions with
+    # ? placeholders for params); stands in for Dataset.frame
+
+    def __init__(self, store, sheet, clauses=(), params=()):
+        self.store = store
+        self.sheet = sheet
+        self.name = table_name(sheet)
+        self.clauses = tuple(clauses)
+        self.params = tuple(params)
+
+    def restrict(self, clause, params):
+        return Table(self.store, self.sheet, self.clauses + (clause,), self.params + tuple(params))
+
+    def source(self):
+        # FROM target for the selected rows
+        if not self.clauses:
+            return quote(self.name)
+        return f'(SELECT * FROM {quote(self.name)} WHERE {" AND ".join(self.clauses)})'
+
+    def columns(self):
+        return [row[1] for row in self.store.connection().execute(f'PRAGMA table_info({quote(self.name)})')
+                if row[1] != ROW]
+
+    def _typed(self, frame):
+        # Date columns of the sheet as datetimes, without the row number
+        for column in SCHEMAS[self.sheet]:
+            if column.kind == 'date' and column.name in frame.columns:
+                frame[column.name] = pd.to_datetime(frame[column.name], unit='ns')
+        return frame.drop(columns=ROW, errors='ignore')
+
+    def read(self, sql):
+        # Run sql with {rows} standing for the selected rows; date columns of the
+        # sheet come back as datetimes
+        params = self.params * sql.count('{rows}')
+        return self._typed(pd.read_sql_query(sql.format(rows=self.source()), self.store.connection(), params=params))
+
+    def chunks(self, chunk_rows):
+        # The selected rows in sheet order as frames of at most chunk_rows rows
+        # (at least one, possibly empty), so only one chunk is in memory at a time
+        sql = f'SELECT * FROM {self.source()} ORDER BY {quote(ROW)}'
+        empty = True
+        for frame in pd.read_sql_query(sql, self.store.connection(), params=self.params, chunksize=chunk_rows):
+            empty = False
+            yield self._typed(frame)
+        if empty:
+            yield self._typed(pd.read_sql_query(sql + ' LIMIT 0', self.store.connection(), params=self.params))
+
+    def count(self):
+        return self.store.connection().execute(
+            f'SELECT COUNT(*) FROM {self.source()}', self.params).fetchone()[0]
+
+
+class SqlStore:
+    # One SQLite file holding the latest version of every sheet, plus a
+    # soms_tables row per sheet with the version it was built from
+
+    def __init__(self, path=None, cache_dir=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.path = path or os.path.join(self.cache_dir, 'soms.sqlite')
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._write_lock():
+            self.connection().execute(
+                'CREATE TABLE IF NOT EXISTS soms_tables '
+                '(name TEXT PRIMARY KEY, version TEXT, rows INTEGER, parse_errors TEXT)')
+
+    def connection(self):
+        # sqlite3 connections are per thread; WAL lets readers continue while a
+        # refresh swaps a table in
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    @contextmanager
+    def _write_lock(self):
+        # One writer across all processes sharing the file
+        with open(self.path + '.lock', 'a') as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _version(self, sheet):
+        return self.connection().execute(
+            'SELECT version, parse_errors, rows FROM soms_tables WHERE name = ?', (table_name(sheet),)).fetchone()
+
+    def load(self, sheet, snapshot, version, parent=None):
+        # Dataset for the sheet's table, (re)built from the snapshot table (see
+        # soms.snapshots.open_snapshot) unless it already holds version; only one
+        # process builds a version.
+        # parent=(version, rows) when the snapshot only appended rows to that
+        # version: a table holding it just takes the new rows.
+        current = self._version(sheet)
+        if current is None or current[0] != version:
+            with self._write_lock():
+                current = self._version(sheet)
+                if current is None or current[0] != version:
+                    if parent is not None and current is not None and (current[0], current[2]) == tuple(parent):
+                        self._append(sheet, snapshot, version, current)
+                    else:
+                        self._ingest(sheet, snapshot, version)
+                    current = self._version(sheet)
+        fingerprint = hashlib.sha1(f'sqlite:{sheet}:{version}'.encode('utf-8')).hexdigest()
+        return Dataset(sheet, None, json.loads(current[1]), fingerprint, Table(self, sheet))
+
+    def _insert(self, table, frame, first_row):
+        placeholders = ', '.join('?' * (len(frame.columns) + 1))
+        self.connection().executemany(f'INSERT INTO {quote(table)} VALUES ({placeholders})',
+                                      ((first_row + i, *values) for i, values in enumerate(_values(frame))))
+
+    def _ingest(self, sheet, snapshot, version):
+        # Type and derive the snapshot chunk by chunk into a staging table, index
+        # it, then swap it in for the previous version in one transaction
+        conn = self.connection()
+        name = table_name(sheet)
+        staging = f'{name}_{uuid.uuid4().hex[:8]}'
+        parse_errors = Counter()
+        rows = 0
+        conn.execute('BEGIN')
+        try:
+            for chunk, raw in enumerate(iter_chunks(snapshot, CHUNK_ROWS)):
+                frame, errors = prepare_frame(sheet, raw)
+                if not chunk:
+                    columns = ', '.join([f'{quote(ROW)} INTEGER PRIMARY KEY'] + [quote(col) for col in frame.columns])
+                    conn.execute(f'CREATE TABLE {quote(staging)} ({columns})')
+                self._insert(staging, frame, rows)
+                parse_errors.update(errors)
+                rows += len(frame)
+            present = set(frame.columns)
+            for i, cols in enumerate(INDEXES.get(sheet, [])):
+                if present.issuperset(cols):
+                    conn.execute(f'CREATE INDEX {quote(f"{staging}_{i}")} ON {quote(staging)} '
+                                 f'({", ".join(map(quote, cols))})')
+            conn.execute(f'DROP TABLE IF EXISTS {quote(name)}')
+            conn.execute(f'ALTER TABLE {quote(staging)} RENAME TO {quote(name)}')
+            conn.execute('INSERT OR REPLACE INTO soms_tables VALUES (?, ?, ?, ?)',
+                         (name, version, rows, json.dumps(dict(parse_errors))))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _append(self, sheet, snapshot, version, current):
+        # Type and derive only the snapshot rows after the current table's and
+        # insert them, in one transaction
+        conn = self.connection()
+        name = table_name(sheet)
+        parse_errors = Counter(json.loads(current[1]))
+        rows = current[2]
+        conn.execute('BEGIN')
+        try:
+            for raw in iter_chunks(snapshot, CHUNK_ROWS, start=rows):
+                if raw.empty:
+                    continue
+                frame, errors = prepare_frame(sheet, raw)
+                self._insert(name, frame, rows)
+                parse_errors.update(errors)
+                rows += len(frame)
+            conn.execute('INSERT OR REPLACE INTO soms_tables VALUES (?, ?, ?, ?)',
+                         (name, version, rows, json.dumps(dict(parse_errors))))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
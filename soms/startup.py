@@ -0,0 +1,67 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+
+# Cold-start accounting of a worker process: seconds from process start to
+# named milestones (the first script run, the first page painted) and how long
+# each lazily imported module took on its first import, including whatever it
+# pulled in that was not loaded yet. The app adds each one to its perf records
+# once, so they show in the performance panel and in the exports.
+
+# Seconds per lazily imported module and per milestone, in the order they happened
+IMPORTS = {}
+MARKS = {}
+_lock = threading.Lock()
+_reported = set()
+
+
+def _process_start():
+    # Wall-clock time the process started (Linux), else when this module was
+    # first imported
+    try:
+        with open('/proc/self/stat') as f:
+            stat = f.read()
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+    except OSError:
+        return time.time()
+    # Field 22, counted from the state after the parenthesized command name, is
+    # the start time in clock ticks since boot
+    ticks = int(stat.rsplit(')', 1)[1].split()[19])
+    return time.time() - uptime + ticks / os.sysconf('SC_CLK_TCK')
+
+
+PROCESS_START = _process_start()
+
+
+def mark(name):
+    # Seconds from process start to the first time name was marked
+    with _lock:
+        if name not in MARKS:
+            MARKS[name] = time.time() - PROCESS_START
+        return MARKS[name]
+
+
+def timed_import(name):
+    # importlib.import_module, recording how long the first import took
+    loaded = name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    if not loaded:
+        with _lock:
+            IMPORTS.setdefault(name, time.perf_counter() - start)
+    return module
+
+
+def unreported():
+    # [(stage, name, seconds)] of the marks ('startup') and imports ('import')
+    # not returned before
+    with _lock:
+        records = ([('startup', name, seconds) for name, seconds in MARKS.items()]
+                   + [('import', name, seconds) for name, seconds in IMPORTS.items()])
+        records = [record for record in records if record[:2] not in _reported]
+        _reported.update(record[:2] for record in records)
+    return records
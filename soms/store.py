@@ -0,0 +1,89 @@
+import hashlib
+from collections import namedtuple
+
+import pandas as pd
+
+from soms.schema import MONEY_COLUMNS, SCHEMAS, apply_schema
+
+
+# Copy-on-Write makes shallow copies safe read-only views of the shared frames
+# (always on from pandas 3)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+STATUS_COLUMNS = ['Job Code', 'Client Name', 'PO received date', 'Project Type', 'S/ONO.', 'SO DATE', 'Remark']
+
+# A typed sheet with its derived columns, shared by every session of the process.
+# frame is shared read-only and passed to the derived tables as is: under
+# Copy-on-Write, frames taken from it copy on write instead of changing it
+# (is_unchanged checks that nothing did). With the SQL backend frame is None
+# and table (a soms.sqlstore.Table) holds the rows instead.
+# Append-only sheets carry their log state (a soms.incremental.LogState).
+Dataset = namedtuple('Dataset', ['name', 'frame', 'parse_errors', 'fingerprint', 'table', 'log'],
+                     defaults=[None, None])
+
+
+def fingerprint_hash(df):
+    # Running sha1 behind frame_fingerprint; rows are hashed one by one with
+    # their index, so it can be extended as rows are appended
+    digest = hashlib.sha1('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    return extend_hash(digest, df)
+
+
+def extend_hash(digest, rows):
+    # Copy of a fingerprint_hash with rows appended to its frame (carrying their
+    # index in the longer frame) hashed in
+    digest = digest.copy()
+    digest.update(pd.util.hash_pandas_object(rows, index=True).to_numpy().tobytes())
+    return digest
+
+
+def frame_fingerprint(df):
+    return fingerprint_hash(df).hexdigest()
+
+
+def _derive_timeline(df):
+    # Open jobs run until today, and no job ends in the future
+    today = pd.Timestamp.now().normalize()
+    actual_end = df['Actual End'].fillna(today)
+    return df.assign(**{'Actual End': actual_end.where(actual_end <= today, today)})
+
+
+def _derive_idle(df):
+    return df.assign(**{'Idle Manhours': df['Days Idle'] * 9})
+
+
+def _derive_status(df):
+    # Relevant columns only, with blank money cells counted as 0
+    columns = [col for col in STATUS_COLUMNS if col in df.columns]
+    return pd.concat([df[columns], df[MONEY_COLUMNS].fillna(0)], axis=1)
+
+
+DERIVE = {
+    'Project Timeline': _derive_timeline,
+    'Idle Manpower': _derive_idle,
+    'Project Status': _derive_status,
+}
+
+
+def prepare_frame(sheet, raw):
+    # Typed frame with the sheet's derived columns, and its parse failure counts
+    typed, parse_errors = apply_schema(raw, SCHEMAS[sheet])
+    return DERIVE[sheet](typed), parse_errors
+
+
+def build_dataset(sheet, raw):
+    frame, parse_errors = prepare_frame(sheet, raw)
+    return Dataset(sheet, frame, parse_errors, frame_fingerprint(frame))
+
+
+def row_count(dataset):
+    return len(dataset.frame) if dataset.table is None else dataset.table.count()
+
+
+def is_unchanged(dataset):
+    # True when the shared frame still matches the fingerprint taken at build time
+    # (SQL-backed datasets share no frame)
+    if dataset.frame is None:
+        return True
+    return frame_fingerprint(dataset.frame) == dataset.fingerprint
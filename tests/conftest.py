@@ -0,0 +1,72 @@
+import http.server
+import os
+import pathlib
+import sys
+import tempfile
+import threading
+
+import pytest
+
+# The tests import soms and benchmarks from the repository root, however pytest
+# is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# soms reads its directories and sheet URLs from the environment at import, so
+# they point at a scratch directory before any test imports it: the sheets are
+# local CSV files there (written by the sheets fixture of test_app.py) and all
+# snapshots, artifacts and caches stay in it
+SCRATCH = pathlib.Path(tempfile.mkdtemp(prefix='soms-tests-'))
+SHEET_FILES = {
+    'Project Timeline': SCRATCH / 'timeline.csv',
+    'Idle Manpower': SCRATCH / 'idle.csv',
+    'Project Status': SCRATCH / 'status.csv',
+}
+os.environ['SOMS_CACHE_DIR'] = str(SCRATCH / 'cache')
+os.environ['SOMS_TIMELINE_URL'] = SHEET_FILES['Project Timeline'].as_uri()
+os.environ['SOMS_IDLE_URL'] = SHEET_FILES['Idle Manpower'].as_uri()
+os.environ['SOMS_STATUS_URL'] = SHEET_FILES['Project Status'].as_uri()
+for name in ('SOMS_ARTIFACT_DIR', 'SOMS_EXPORT_DIR', 'SOMS_HISTORY_DIR', 'SOMS_BACKEND', 'SOMS_PERF_LOG', 'SOMS_PERF_PROM'):
+    os.environ.pop(name, None)
+
+
+class Sheet(http.server.BaseHTTPRequestHandler):
+    # Stand-in for a published sheet: serves server.body; with server.etag or
+    # server.last_modified set it answers If-None-Match or If-Modified-Since
+    # with 304, with server.status set it fails with that status and with
+    # server.truncate it closes the connection halfway through the body
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status:
+            self.send_error(server.status)
+            return
+        if ((server.etag and self.headers.get('If-None-Match') == server.etag)
+                or (server.last_modified and self.headers.get('If-Modified-Since') == server.last_modified)):
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(server.body)))
+        if server.etag:
+            self.send_header('ETag', server.etag)
+        if server.last_modified:
+            self.send_header('Last-Modified', server.last_modified)
+        self.end_headers()
+        self.wfile.write(server.body[:len(server.body) // 2] if server.truncate else server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_sheet():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Sheet)
+    server.body, server.etag, server.last_modified, server.status, server.truncate = b'', None, None, None, False
+    server.requests = []
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/sheet.csv'
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
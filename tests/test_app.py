@@ -0,0 +1,63 @@
+import json
+import os
+
+import pytest
+import streamlit
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.synthetic import GENERATORS
+from conftest import SHEET_FILES
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# app.py sends the cached chart specs through Streamlit internals
+# (emit_plotly_spec) rather than st.plotly_chart; these runs fail if a Streamlit
+# upgrade breaks that path or its fallback
+
+
+@pytest.fixture(scope='module', autouse=True)
+def sheets():
+    for sheet, path in SHEET_FILES.items():
+        GENERATORS[sheet](500).to_csv(path, index=False)
+
+
+def visit_every_sheet():
+    # The app run on each sheet; [(sheet, chart protos)]
+    at = AppTest.from_file(APP, default_timeout=120)
+    at.run()
+    visits = []
+    for sheet in SHEET_FILES:
+        at.sidebar.radio[0].set_value(sheet).run()
+        assert not at.exception, [e.value for e in at.exception]
+        visits.append((sheet, [chart.proto for chart in at.get('plotly_chart')]))
+    return visits
+
+
+def test_charts_sent_as_cached_specs(monkeypatch):
+    def fallback(*args, **kwargs):
+        raise AssertionError('st.plotly_chart fallback used')
+
+    monkeypatch.setattr(streamlit, 'plotly_chart', fallback)
+    for sheet, charts in visit_every_sheet():
+        assert charts, sheet
+        for chart in charts:
+            # The spec as cached, unchanged by a second serialization
+            assert json.loads(chart.spec)['data']
+            assert chart.id and chart.theme == 'streamlit'
+
+
+def test_fallback_after_element_id_registered(monkeypatch):
+    # A failure once the fast path has taken its element id still renders every
+    # chart through st.plotly_chart, without a duplicate element id
+    import streamlit.elements.lib.utils as utils
+
+    register = utils.compute_and_register_element_id
+
+    def register_then_fail(*args, **kwargs):
+        register(*args, **kwargs)
+        raise RuntimeError('internals moved')
+
+    monkeypatch.setattr(utils, 'compute_and_register_element_id', register_then_fail)
+    for sheet, charts in visit_every_sheet():
+        assert charts, sheet
+        assert len({chart.id for chart in charts}) == len(charts)
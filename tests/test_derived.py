@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import GENERATORS
+from soms.derived import PIPELINE
+from soms.filters import build_index, filter_dataset
+from soms.snapshots import open_snapshot, refresh_snapshot
+from soms.sqlstore import SqlStore
+from soms.store import build_dataset
+
+# Every SQL twin returns the same value as the node it stands in for, on the
+# whole sheet and under filters. Tables sorted by a value that can tie are
+# compared in key order.
+
+ROWS = 4000
+SORTED_BY_VALUE = {'client_idle': 'Client', 'client_cost': 'Client', 'remark_counts': None}
+
+
+@pytest.fixture(scope='module')
+def backends(tmp_path_factory):
+    # {sheet: (in-memory dataset, SQLite dataset)} of one snapshot per sheet
+    cache_dir = tmp_path_factory.mktemp('derived')
+    store = SqlStore(cache_dir=cache_dir)
+    datasets = {}
+    for sheet, generate in GENERATORS.items():
+        path = cache_dir / f'{sheet}.csv'
+        generate(ROWS, 3).to_csv(path, index=False)
+        refresh_snapshot(path.as_uri(), cache_dir)
+        table, version = open_snapshot(path.as_uri(), cache_dir)
+        datasets[sheet] = (build_dataset(sheet, table.to_pandas()), store.load(sheet, table, version['sha256']))
+    return datasets
+
+
+def selections(index):
+    yield {}
+    if index.years():
+        yield {'year': index.years()[1], 'month': index.months()[2]}
+    for label in ('Client', 'Site'):
+        if index.values(label):
+            yield {label: index.values(label)[0]}
+
+
+def normalized(name, value):
+    if isinstance(value, pd.Series):
+        value = value.rename_axis('key').reset_index()
+    if isinstance(value, pd.DataFrame):
+        if name in SORTED_BY_VALUE:
+            value = value.sort_values(SORTED_BY_VALUE[name] or 'key')
+        return value.reset_index(drop=True).astype({col: object for col in value.columns
+                                                    if isinstance(value[col].dtype, pd.CategoricalDtype)})
+    return value
+
+
+def assert_same(name, expected, actual):
+    expected, actual = normalized(name, expected), normalized(name, actual)
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_index_type=False,
+                                      check_column_type=False)
+    elif isinstance(expected, dict):
+        assert expected.keys() == actual.keys()
+        for key in expected:
+            assert actual[key] == pytest.approx(expected[key], nan_ok=True), key
+    else:
+        assert list(actual) == list(expected)
+
+
+@pytest.mark.parametrize('name', sorted(PIPELINE.queries))
+def test_query_matches_node(backends, name):
+    sheet = PIPELINE.queries[name].root
+    memory, sqlite = backends[sheet]
+    memory_index, sqlite_index = build_index(memory), build_index(sqlite)
+    for selection in selections(memory_index):
+        PIPELINE.clear()
+        expected = PIPELINE.compute(name, {sheet: filter_dataset(memory, memory_index, **selection)})
+        actual = PIPELINE.compute(name, {sheet: filter_dataset(sqlite, sqlite_index, **selection)})
+        assert_same(name, expected, actual)
+    PIPELINE.clear()
+
+
+def test_average_cost_rounds_half_to_even(backends):
+    # idle_frame(4000, 3) averages to a half: 34 in pandas, 35 from SQLite's ROUND
+    memory, sqlite = backends['Idle Manpower']
+    assert np.round(memory.frame['Pay Per Day'].mean(), 0) == PIPELINE.compute('idle_metrics', {
+        'Idle Manpower': sqlite})['avg_cost_of_idle_time']
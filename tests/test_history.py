@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import status_frame
+from soms import history as history_module
+from soms.history import TIME, History, changes, totals
+from soms.store import build_dataset
+
+# A change log of seeded versions (changed balances, a removed and a re-added
+# job, merged files) reads back the per-version state it was recorded from
+
+SHEET = 'Project Status'
+KEY = 'Job Code'
+DAY = 86400
+START = pd.Timestamp('2024-01-01').timestamp()
+VERSIONS = 10
+
+
+def versions():
+    # [frame] of VERSIONS versions of the sheet
+    rng = np.random.default_rng(0)
+    frame = build_dataset(SHEET, status_frame(200, 0)).frame
+    frames = []
+    for i in range(VERSIONS):
+        if i:
+            frame = frame.copy()
+            picked = rng.choice(len(frame), 5, replace=False)
+            frame.loc[frame.index[picked], 'Balance'] = rng.normal(5000, 20000, 5).round(2)
+        if i == 3:
+            removed = frame.iloc[[0]]
+            frame = frame.iloc[1:]
+        if i == 6:
+            frame = pd.concat([frame, removed.assign(Balance=1234.0)])
+        frames.append(frame.reset_index(drop=True))
+    return frames
+
+
+def at(i):
+    return pd.Timestamp(int((START + i * DAY) * 1e9))
+
+
+@pytest.fixture(scope='module')
+def recorded(tmp_path_factory):
+    # (History with every version recorded, [frame]); files are merged every
+    # 4 versions
+    frames = versions()
+    history = History(SHEET, tmp_path_factory.mktemp('history'))
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(history_module, 'COMPACT_FILES', 4)
+        for i, frame in enumerate(frames):
+            dataset = build_dataset(SHEET, frame.iloc[:0])._replace(frame=frame)
+            assert history.record(dataset, f'v{i}', START + i * DAY) > 0
+    return history, frames
+
+
+def state(frame):
+    # Balance per job, unset balances counting 0
+    return frame.set_index(KEY)['Balance'].fillna(0)
+
+
+def test_compacted(recorded):
+    history, _ = recorded
+    spans = [(first, last) for first, last, _ in history.files()]
+    assert [first == last for first, last in spans] == [False, False, True, True]
+    assert history.first_time() == at(0)
+    assert history.latest_time() == at(VERSIONS - 1)
+
+
+def test_totals_of_every_version(recorded):
+    history, frames = recorded
+    total = totals(history.read(['Balance']), 'Balance', KEY)
+    expected = pd.Series([state(frame).sum() for frame in frames], index=[at(i) for i in range(VERSIONS)])
+    np.testing.assert_allclose(total.to_numpy(), expected.to_numpy())
+    assert list(total.index) == list(expected.index)
+
+
+@pytest.mark.parametrize('first, last', [(2, 7), (3, 9), (0, 4), (5, 5)])
+def test_window(recorded, first, last):
+    history, frames = recorded
+    rows = history.read(['Balance'], at(first), at(last))
+    total = totals(rows, 'Balance', KEY)
+    assert list(total.index) == [at(i) for i in range(first, last + 1)]
+    np.testing.assert_allclose(total.to_numpy(), [state(frames[i]).sum() for i in range(first, last + 1)])
+
+    job_changes = changes(rows, 'Balance', KEY, at(first))
+    before, after = state(frames[first]), state(frames[last])
+    keys = before.index.union(after.index)
+    diff = after.reindex(keys, fill_value=0) - before.reindex(keys, fill_value=0)
+    diff = diff[diff != 0]
+    assert sorted(job_changes.index) == sorted(diff.index)
+    np.testing.assert_allclose(job_changes['Change'].to_numpy(), diff.reindex(job_changes.index).to_numpy())
+
+
+def test_removed_job_reads_as_gone(recorded):
+    history, frames = recorded
+    job = frames[0][KEY].iloc[0]
+    rows = history.read(['Balance'], at(4), at(5))
+    assert job not in set(rows[KEY])
+    rows = history.read(['Balance'], at(5), at(6))
+    assert rows.loc[rows[KEY] == job, 'Balance'].tolist() == [1234.0]
+
+
+def test_same_version_twice(recorded):
+    history, frames = recorded
+    files = history.files()
+    dataset = build_dataset(SHEET, frames[-1].iloc[:0])._replace(frame=frames[-1])
+    assert history.record(dataset, f'v{VERSIONS - 1}', START + VERSIONS * DAY) is None
+    assert history.files() == files
+    assert history.latest_time() == at(VERSIONS - 1)
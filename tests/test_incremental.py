@@ -0,0 +1,76 @@
+import hashlib
+
+import pytest
+
+from benchmarks.synthetic import GENERATORS
+from soms.derived import PIPELINE
+from soms.incremental import append_rows, track
+from soms.snapshots import _appended_table, _paths, read_meta, refresh_snapshot
+from soms.store import build_dataset
+from test_derived import assert_same
+
+# Folding appended rows into a tracked dataset gives what a full rebuild of the
+# whole sheet gives: the same frame, fingerprint and rollup aggregates
+
+SHEET = 'Idle Manpower'
+BODY = b'Job,Amount\nA1,10\nA2,20\n'
+
+
+@pytest.fixture(autouse=True)
+def empty_pipeline():
+    PIPELINE.clear()
+    yield
+    PIPELINE.clear()
+
+
+@pytest.mark.parametrize('first, added', [(2500, 500), (2999, 1)])
+def test_append_matches_rebuild(first, added):
+    raw = GENERATORS[SHEET](first + added, 1)
+    # A client the first rows never had, sorting ahead of the others
+    raw.loc[first:, 'Client'] = 'Aardvark Trading'
+    tail = raw.iloc[first:].reset_index(drop=True)
+    appended = append_rows(track(build_dataset(SHEET, raw.iloc[:first])), tail)
+    rebuilt = track(build_dataset(SHEET, raw))
+
+    assert appended.frame.equals(rebuilt.frame)
+    assert appended.frame.dtypes.equals(rebuilt.frame.dtypes)
+    assert appended.fingerprint == rebuilt.fingerprint
+    assert appended.parse_errors == rebuilt.parse_errors
+    for name in sorted(PIPELINE.rollups):
+        PIPELINE.clear()
+        # The rollup twin on the appended dataset, the node on the full frame
+        assert_same(name, PIPELINE.compute(name, {SHEET: rebuilt._replace(log=None)}),
+                    PIPELINE.compute(name, {SHEET: appended}))
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    # (meta, data path) of a snapshot of BODY
+    path = tmp_path / 'sheet.csv'
+    path.write_bytes(BODY)
+    refresh_snapshot(path.as_uri(), tmp_path)
+    return read_meta(path.as_uri(), tmp_path), _paths(path.as_uri(), tmp_path)[0]
+
+
+def test_appended_rows_parse_alone(snapshot):
+    meta, data_path = snapshot
+    table = _appended_table(BODY + b'A3,30\n', meta, data_path)
+    assert table.to_pandas()['Amount'].tolist() == [10, 20, 30]
+
+
+def test_edited_last_row_is_not_an_append(tmp_path):
+    # Without a final line break, '20' becoming '205' keeps the old bytes as a prefix
+    body = BODY.rstrip(b'\n')
+    path = tmp_path / 'sheet.csv'
+    path.write_bytes(body)
+    refresh_snapshot(path.as_uri(), tmp_path)
+    meta = read_meta(path.as_uri(), tmp_path)
+    assert meta['sha256'] == hashlib.sha256(body).hexdigest()
+    assert _appended_table(body + b'5\n', meta, _paths(path.as_uri(), tmp_path)[0]) is None
+    assert _appended_table(body + b'\nA3,30\n', meta, _paths(path.as_uri(), tmp_path)[0]) is not None
+
+
+def test_cell_of_another_type_is_not_an_append(snapshot):
+    meta, data_path = snapshot
+    assert _appended_table(BODY + b'A3,n/a 30\n', meta, data_path) is None
+    assert _appended_table(BODY + b'A3,30.5\n', meta, data_path) is None
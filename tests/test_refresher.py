@@ -0,0 +1,21 @@
+import time
+
+from benchmarks.synthetic import GENERATORS
+from soms.refresher import Refresher
+from soms.sources import Source
+
+SHEET = 'Idle Manpower'
+
+
+def test_refreshes_every_period(http_sheet):
+    # interval 0.5 s: a first load, then a revalidation every 0.4 s period
+    http_sheet.body = GENERATORS[SHEET](50).to_csv(index=False).encode('utf-8')
+    refresher = Refresher([Source(SHEET, http_sheet.url, 0.5)]).start()
+    try:
+        refresher.dataset(SHEET)
+        time.sleep(2.1)
+    finally:
+        refresher.stop()
+    # Every timer tick fetches (about 6 in all), not every other one
+    assert len(http_sheet.requests) >= 5
+    assert not refresher.status()[SHEET][1]
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from soms.schema import parse_money
+
+
+@pytest.mark.parametrize('cell, value', [
+    ('OMR 1,234.50', 1234.5),
+    ('OMR (1,234)', -1234.0),
+    ('(1,234)', -1234.0),
+    ('-1,234', -1234.0),
+    ('OMR -5', -5.0),
+    (' 12 ', 12.0),
+    ('R.O. 7.5', 7.5),
+])
+def test_money_cells(cell, value):
+    values, failed = parse_money(pd.Series([cell], dtype=object))
+    assert values.iloc[0] == value
+    assert failed == 0
+
+
+@pytest.mark.parametrize('cell', ['12-Mar', '1.5-2', '1.2.3', 'OMR', 'n/a 5', '5 OMR x'])
+def test_malformed_money_cells_fail(cell):
+    values, failed = parse_money(pd.Series([cell, cell, 'OMR 1'], dtype=object))
+    assert np.isnan(values.iloc[0])
+    assert values.iloc[2] == 1
+    assert failed == 2
+
+
+def test_null_tokens_are_not_failures():
+    values, failed = parse_money(pd.Series(['', '-', '#VALUE!', None], dtype=object))
+    assert values.isna().all()
+    assert failed == 0
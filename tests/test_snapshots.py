@@ -0,0 +1,96 @@
+import hashlib
+import http.client
+import urllib.error
+
+import pytest
+
+from soms.snapshots import ensure_snapshot, load_snapshot, open_snapshot, read_meta, refresh_snapshot
+
+BODY = b'Job,Amount\nA1,10\nA2,20\n'
+
+
+@pytest.fixture
+def sheet(http_sheet):
+    http_sheet.body = BODY
+    return http_sheet
+
+
+def test_not_modified_keeps_snapshot(sheet, tmp_path):
+    sheet.etag = '"v1"'
+    assert refresh_snapshot(sheet.url, tmp_path)
+    checked = read_meta(sheet.url, tmp_path)['checked_at']
+    assert not refresh_snapshot(sheet.url, tmp_path)
+    assert sheet.requests[-1]['If-None-Match'] == '"v1"'
+    meta = read_meta(sheet.url, tmp_path)
+    assert meta['checked_at'] > checked
+    assert meta['sha256'] == hashlib.sha256(BODY).hexdigest()
+    assert open_snapshot(sheet.url, tmp_path)[1]['sha256'] == meta['sha256']
+
+
+def test_not_modified_since(sheet, tmp_path):
+    sheet.last_modified = 'Wed, 01 May 2024 08:00:00 GMT'
+    assert refresh_snapshot(sheet.url, tmp_path)
+    assert read_meta(sheet.url, tmp_path)['last_modified'] == sheet.last_modified
+    assert not refresh_snapshot(sheet.url, tmp_path)
+    assert sheet.requests[-1]['If-Modified-Since'] == sheet.last_modified
+    assert 'If-None-Match' not in sheet.requests[-1]
+    sheet.body, sheet.last_modified = BODY + b'A3,30\n', 'Thu, 02 May 2024 08:00:00 GMT'
+    assert refresh_snapshot(sheet.url, tmp_path)
+    assert read_meta(sheet.url, tmp_path)['last_modified'] == sheet.last_modified
+
+
+def test_unchanged_body_without_validators(sheet, tmp_path):
+    assert refresh_snapshot(sheet.url, tmp_path)
+    data, = tmp_path.glob('*.feather')
+    mtime = data.stat().st_mtime_ns
+    assert not refresh_snapshot(sheet.url, tmp_path)
+    assert 'If-None-Match' not in sheet.requests[-1]
+    assert data.stat().st_mtime_ns == mtime
+    assert read_meta(sheet.url, tmp_path)['sha256'] == hashlib.sha256(BODY).hexdigest()
+
+
+def test_changed_body_rewrites_snapshot(sheet, tmp_path):
+    assert refresh_snapshot(sheet.url, tmp_path)
+    sheet.body = b'Job,Amount\nA1,15\nA2,20\n'
+    assert refresh_snapshot(sheet.url, tmp_path)
+    table, version = open_snapshot(sheet.url, tmp_path)
+    assert version['sha256'] == hashlib.sha256(sheet.body).hexdigest() == read_meta(sheet.url, tmp_path)['sha256']
+    assert version['parent'] is None
+    assert table.to_pandas()['Amount'].tolist() == [15, 20]
+
+
+def test_appended_rows_keep_parent(sheet, tmp_path):
+    assert refresh_snapshot(sheet.url, tmp_path)
+    sheet.body = BODY + b'A3,30\nA4,40\n'
+    assert refresh_snapshot(sheet.url, tmp_path)
+    table, version = open_snapshot(sheet.url, tmp_path)
+    assert version['parent'] == hashlib.sha256(BODY).hexdigest()
+    assert version['parent_rows'] == 2
+    assert version['rows'] == table.num_rows == 4
+    assert table.slice(version['parent_rows']).to_pandas()['Job'].tolist() == ['A3', 'A4']
+
+
+def test_failed_fetch_serves_last_snapshot(sheet, tmp_path):
+    frame = load_snapshot(sheet.url, tmp_path, ttl=0)
+    sheet.status = 500
+    with pytest.raises(urllib.error.HTTPError):
+        refresh_snapshot(sheet.url, tmp_path)
+    assert load_snapshot(sheet.url, tmp_path, ttl=0).equals(frame)
+    meta = ensure_snapshot(sheet.url, tmp_path, ttl=0)
+    assert meta['attempted_at'] > meta['checked_at']
+    assert meta['sha256'] == hashlib.sha256(BODY).hexdigest()
+
+
+def test_truncated_fetch_serves_last_snapshot(sheet, tmp_path):
+    frame = load_snapshot(sheet.url, tmp_path, ttl=0)
+    sheet.body, sheet.truncate = BODY + b'A3,30\n', True
+    with pytest.raises(http.client.IncompleteRead):
+        refresh_snapshot(sheet.url, tmp_path)
+    assert read_meta(sheet.url, tmp_path)['attempted_at'] > read_meta(sheet.url, tmp_path)['checked_at']
+    assert load_snapshot(sheet.url, tmp_path, ttl=0).equals(frame)
+
+
+def test_failed_first_fetch_raises(sheet, tmp_path):
+    sheet.status = 404
+    with pytest.raises(urllib.error.HTTPError):
+        ensure_snapshot(sheet.url, tmp_path, ttl=0)
@@ -0,0 +1,63 @@
+import datetime
+
+import pytest
+
+from benchmarks.synthetic import GENERATORS
+from soms.derived import PIPELINE
+from soms.downsample import GRANULARITIES
+from soms.figcache import FIGURES
+from soms.filters import build_index, filter_dataset
+from soms.pages import PAGES
+from soms.store import build_dataset, is_unchanged
+
+# Page code must never mutate the shared datasets: every page, with its default
+# and non-default options, and the filters leave the frame's fingerprint as built
+
+ROWS = 2000
+
+PAGE_OPTIONS = {
+    'Project Timeline': [
+        {},
+        {'window': (datetime.date(2020, 1, 1), datetime.date(2021, 6, 30)), 'rows': 50, 'page': 2},
+        {'find': 'J00001'},
+        {'active': True, 'rows': None},
+    ],
+    'Idle Manpower': [{}] + [{'granularity': name} for name, _, _ in GRANULARITIES],
+    'Project Status': [{}],
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    # Every page computes its tables and figures afresh
+    PIPELINE.clear()
+    FIGURES.clear()
+    yield
+    PIPELINE.clear()
+    FIGURES.clear()
+
+
+@pytest.fixture(scope='module', params=list(GENERATORS))
+def dataset(request):
+    return build_dataset(request.param, GENERATORS[request.param](ROWS))
+
+
+def test_pages_leave_dataset_unchanged(dataset):
+    for options in PAGE_OPTIONS[dataset.name]:
+        page = PAGES[dataset.name](dataset, **options)
+        assert page.figures
+        assert is_unchanged(dataset), options
+
+
+def test_filters_leave_dataset_unchanged(dataset):
+    index = build_index(dataset)
+    selections = [{}]
+    if index.years():
+        selections += [{'year': index.years()[0]}, {'year': index.years()[0], 'month': index.months()[0]}]
+    for label in ('Client', 'Site'):
+        if index.values(label):
+            selections.append({label: index.values(label)[0]})
+    for selection in selections:
+        filtered = filter_dataset(dataset, index, **selection)
+        PAGES[dataset.name](filtered)
+        assert is_unchanged(dataset), selection
@@ -0,0 +1,40 @@
+import datetime
+
+import pytest
+
+from benchmarks.synthetic import GENERATORS
+from soms.derived import PIPELINE
+from soms.pages.common import derived
+from soms.pages.timeline import timeline_page
+from soms.perf import Recorder
+from soms.store import build_dataset
+
+SHEET = 'Project Timeline'
+WINDOW = (datetime.date(2020, 1, 1), datetime.date(2020, 3, 1))
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    PIPELINE.clear()
+    return build_dataset(SHEET, GENERATORS[SHEET](2000))
+
+
+def window_codes(dataset):
+    # Job codes in the window, in display order
+    index = derived('timeline_index', dataset, Recorder(SHEET))
+    positions = index.select(WINDOW)
+    return index.jobs['job_code'].iloc[index.order[positions]].astype(str).tolist()
+
+
+def test_find_within_window(dataset):
+    codes = window_codes(dataset)
+    page = timeline_page(dataset, window=WINDOW, find=codes[2])
+    assert page.notes == [f'Jobs 3-{min(102, len(codes)):,} of {len(codes):,}']
+
+
+def test_find_outside_window(dataset):
+    codes = set(window_codes(dataset))
+    outside = next(code for code in dataset.frame['job_code'].astype(str) if code not in codes)
+    page = timeline_page(dataset, window=WINDOW, find=outside)
+    assert page.notes[0] == f"No job code starts with '{outside}' in the date window."
+    assert page.notes[1].startswith('Jobs 1-')